@@ -0,0 +1,737 @@
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+import time
+import xmlrpc.client
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import psutil
+
+import scrapper
+
+_logger = logging.getLogger("3cx_scraper.bench")
+
+BENCH_SIZES = os.getenv("BENCH_SIZES", "100,1000,5000")
+BENCH_PAGE_SIZE = int(os.getenv("BENCH_PAGE_SIZE", "100"))
+BENCH_LATENCY_MS = float(os.getenv("BENCH_LATENCY_MS", "150"))
+
+# Offline stand-in for the 3CX web client. Same login ids, a .loading
+# spinner while each page is fetched, date filters, a page-size select and a
+# pager, all driven from /bench/calls.
+SPA_HTML = """<!DOCTYPE html>
+<html>
+<head><title>3CX bench</title>
+<style>.loading { position: fixed; inset: 0; background: #fff8; }</style>
+</head>
+<body>
+<div id="app"></div>
+<script>
+var app = document.getElementById('app');
+var state = {page: 0, size: 25, from: '', to: '', seq: 0};
+
+function renderLogin() {
+    app.innerHTML =
+        '<form id="loginForm">' +
+        '<input id="loginInput" name="username" type="text" placeholder="User">' +
+        '<input id="passwordInput" name="password" type="password">' +
+        '<button id="submitBtn" type="submit">Login</button></form>';
+    document.getElementById('loginForm').addEventListener('submit', function (e) {
+        e.preventDefault();
+        var body = JSON.stringify({
+            Username: document.getElementById('loginInput').value,
+            Password: document.getElementById('passwordInput').value});
+        fetch('/webclient/api/Login/GetAccessToken',
+              {method: 'POST', body: body}).then(function (r) {
+            return r.json();
+        }).then(function (data) {
+            if (data.Status !== 'AuthSuccess') { return; }
+            localStorage.setItem('token', data.Token.access_token);
+            location.hash = '#/office/reports/call-reports';
+        });
+    });
+}
+
+function renderReport() {
+    app.innerHTML =
+        '<form id="filters">' +
+        '<input formcontrolname="from" type="date">' +
+        '<input formcontrolname="to" type="date">' +
+        '<button class="btn-primary" type="submit">Apply</button></form>' +
+        '<table><thead><tr><th>Call Time</th><th>Call ID</th><th>From</th>' +
+        '<th>To</th><th>Direction</th><th>Status</th><th>Queue</th>' +
+        '<th>Ringing</th><th>Talking</th><th>Cost</th><th>Details</th>' +
+        '</tr></thead><tbody></tbody></table>' +
+        '<div class="pagination"><select name="pageSize">' +
+        '<option>10</option><option selected>25</option>' +
+        '<option>__MAX__</option></select>' +
+        '<ul><li class="page-item next"><a href="#" aria-label="Next">&rsaquo;</a>' +
+        '</li></ul></div>';
+    var inputs = app.querySelectorAll('#filters input');
+    document.getElementById('filters').addEventListener('submit', function (e) {
+        e.preventDefault();
+        state.from = inputs[0].value;
+        state.to = inputs[1].value;
+        state.page = 0;
+        load();
+    });
+    app.querySelector('select').addEventListener('change', function (e) {
+        state.size = parseInt(e.target.value, 10);
+        state.page = 0;
+        load();
+    });
+    app.querySelector('li.next a').addEventListener('click', function (e) {
+        e.preventDefault();
+        if (!this.parentNode.classList.contains('disabled')) {
+            state.page += 1;
+            load();
+        }
+    });
+    load();
+}
+
+function load() {
+    var seq = ++state.seq;
+    var spinner = document.createElement('div');
+    spinner.className = 'loading';
+    document.body.appendChild(spinner);
+    var query = '?page=' + state.page + '&size=' + state.size +
+        '&from=' + state.from + '&to=' + state.to;
+    fetch('/bench/calls' + query, {headers: {
+        Authorization: 'Bearer ' + localStorage.getItem('token')}}
+    ).then(function (r) { return r.json(); }).then(function (data) {
+        if (seq !== state.seq) { spinner.remove(); return; }
+        var tbody = app.querySelector('tbody');
+        tbody.innerHTML = data.rows.map(function (cells) {
+            return '<tr>' + cells.map(function (c) {
+                return '<td>' + c + '</td>';
+            }).join('') + '</tr>';
+        }).join('');
+        var next = app.querySelector('li.next');
+        next.classList.toggle('disabled', !data.more);
+        spinner.remove();
+    });
+}
+
+function route() {
+    if (!localStorage.getItem('token') || location.hash.indexOf('#/login') === 0) {
+        if (location.hash.indexOf('#/login') !== 0) { location.hash = '#/login'; }
+        renderLogin();
+    } else {
+        renderReport();
+    }
+}
+window.addEventListener('hashchange', route);
+route();
+</script>
+</body>
+</html>
+"""
+
+ODOO_FIELDS = {
+    'call_id': 'char', 'call_from': 'char', 'call_to': 'char',
+    'call_time': 'datetime', 'call_type': 'char', 'call_status': 'char',
+    'call_ringing_time': 'float', 'call_talking_time': 'float',
+    'call_cost': 'char', 'call_activity_details': 'char',
+}
+
+
+def generate_calls(count, until=None):
+    # Newest first, spread over the scraper's window so every call is in range
+    until = until or datetime.now().replace(microsecond=0)
+    step = scrapper.THREECX_WINDOW_HOURS * 3600 * 0.9 / max(count, 1)
+    calls = []
+    for i in range(count):
+        start = until - timedelta(seconds=int((i + 1) * step))
+        answered = i % 4 != 0
+        calls.append({
+            'id': f"bench-{i:07d}",
+            'start': start,
+            'cells': [
+                start.strftime('%m/%d/%Y %I:%M:%S %p'),
+                f"bench-{i:07d}",
+                f"Ext {200 + i % 50} ({200 + i % 50})",
+                f"+1555{i:07d}",
+                'Outbound' if i % 2 else 'Inbound',
+                'Answered' if answered else 'Unanswered',
+                '',
+                f"0:00:{i % 30:02d}",
+                f"0:{i % 60:02d}:{i % 50:02d}" if answered else '0:00:00',
+                f"{(i % 7) * 0.05:.2f}",
+                'Ended by caller',
+            ],
+        })
+    return calls
+
+
+def hms_to_iso_duration(value):
+    hours, minutes, seconds = (int(part) for part in value.split(':'))
+    return f"PT{hours}H{minutes}M{seconds}S"
+
+
+class MockThreeCX:
+    # Serves the SPA, its JSON data endpoint and the xAPI call log
+    def __init__(self, latency_ms=None, page_size=None):
+        self.latency = (BENCH_LATENCY_MS if latency_ms is None
+                        else latency_ms) / 1000.0
+        self.max_page_size = page_size or BENCH_PAGE_SIZE
+        self.calls = []
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def reset(self, calls):
+        self.calls = calls
+        self.requests = 0
+
+    def in_range(self, date_from, date_to):
+        calls = self.calls
+        if date_from:
+            start = datetime.strptime(date_from, '%Y-%m-%d')
+            calls = [c for c in calls if c['start'] >= start]
+        if date_to:
+            end = datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1)
+            calls = [c for c in calls if c['start'] < end]
+        return calls
+
+    def api_entry(self, call):
+        cells = call['cells']
+        return {
+            'CallHistoryId': call['id'],
+            'StartTime': call['start'].astimezone(timezone.utc).strftime(
+                '%Y-%m-%dT%H:%M:%SZ'),
+            'SourceDn': cells[2],
+            'DestinationCallerId': cells[3],
+            'SrcInternal': cells[4] == 'Outbound',
+            'DstInternal': cells[4] == 'Inbound',
+            'Answered': cells[5] == 'Answered',
+            'RingingDuration': hms_to_iso_duration(cells[7]),
+            'TalkingDuration': hms_to_iso_duration(cells[8]),
+            'CallCost': cells[9],
+            'Reason': cells[10],
+        }
+
+    def handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def send(self, code, body, content_type='application/json'):
+                data = body if isinstance(body, bytes) else \
+                    json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                with mock.lock:
+                    mock.requests += 1
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                self.send(200, {'Status': 'AuthSuccess',
+                                'Token': {'access_token': 'bench-token'}})
+
+            def do_GET(self):
+                with mock.lock:
+                    mock.requests += 1
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if url.path in ('/', '/index.html'):
+                    html = SPA_HTML.replace('__MAX__', str(mock.max_page_size))
+                    return self.send(200, html.encode(), 'text/html')
+                if url.path == '/bench/calls':
+                    time.sleep(mock.latency)
+                    calls = mock.in_range(query.get('from'), query.get('to'))
+                    size = int(query.get('size', 25))
+                    start = int(query.get('page', 0)) * size
+                    return self.send(200, {
+                        'rows': [c['cells'] for c in calls[start:start + size]],
+                        'more': start + size < len(calls)})
+                if url.path.startswith('/xapi/v1/ReportCallLogData/'):
+                    time.sleep(mock.latency)
+                    period = dict(re.findall(
+                        r'(periodFrom|periodTo)=([0-9T:\-]+Z)', url.path))
+                    start = datetime.fromisoformat(
+                        period['periodFrom'].replace('Z', '+00:00'))
+                    end = datetime.fromisoformat(
+                        period['periodTo'].replace('Z', '+00:00'))
+                    calls = [c for c in mock.calls
+                             if start <= c['start'].astimezone() <= end]
+                    skip = int(query.get('$skip', 0))
+                    top = int(query.get('$top', 100))
+                    return self.send(200, {'value': [
+                        mock.api_entry(c) for c in calls[skip:skip + top]]})
+                self.send(404, {})
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+DOMAIN_OPERATORS = {
+    '=': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    'in': lambda a, b: a in b,
+    '>=': lambda a, b: a is not None and a >= b,
+    '<=': lambda a, b: a is not None and a <= b,
+    '>': lambda a, b: a is not None and a > b,
+    '<': lambda a, b: a is not None and a < b,
+}
+
+
+def match_domain_leaf(record, leaf):
+    field, op, value = leaf
+    return DOMAIN_OPERATORS[op](record.get(field), value)
+
+
+class MockOdoo:
+    # Just enough of Odoo's JSON-RPC and XML-RPC for logs.3cx, counting every
+    # call by method and every HTTP request. With batch=False it refuses
+    # JSON-RPC batch requests the way stock Odoo does.
+    def __init__(self, latency_ms=0.0, batch=True):
+        self.latency = latency_ms / 1000.0
+        self.batch = batch
+        self.records = {}
+        # Records of models other than logs.3cx
+        self.other = {}
+        self.calls = {}
+        self.requests = 0
+        self.next_id = 1
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+
+    def reset(self):
+        self.records = {}
+        self.other = {}
+        self.calls = {}
+        self.requests = 0
+        self.next_id = 1
+
+    @property
+    def rpc_count(self):
+        return sum(self.calls.values())
+
+    def call(self, service, method, args):
+        with self.lock:
+            key = method if service != 'object' else \
+                f"{args[3]}.{args[4]}"
+            self.calls[key] = self.calls.get(key, 0) + 1
+            if service == 'common':
+                return 2 if method in ('login', 'authenticate') else \
+                    {'server_version': '16.0'}
+            model, method = args[3], args[4]
+            params = args[5] if len(args) > 5 else []
+            kwargs = args[6] if len(args) > 6 else {}
+            return self.execute(model, method, params, kwargs)
+
+    def execute(self, model, method, params, kwargs):
+        if model == 'res.users' and method == 'context_get':
+            return {'lang': 'en_US', 'tz': 'UTC'}
+        if model == 'ir.model':
+            return [1]
+        if method == 'fields_get':
+            return {name: {'type': kind, 'string': name}
+                    for name, kind in ODOO_FIELDS.items()}
+        records = self.records if model == 'logs.3cx' else \
+            self.other.setdefault(model, {})
+        if method in ('search_read', 'search'):
+            domain = params[0] if params else kwargs.get('domain', [])
+            found = [dict(rec, id=rec_id) for rec_id, rec in records.items()
+                     if all(match_domain_leaf(rec, leaf) for leaf in domain)]
+            return [rec['id'] for rec in found] if method == 'search' else found
+        if method == 'create':
+            values = params[0]
+            ids = []
+            for vals in values if isinstance(values, list) else [values]:
+                rec_id = self.next_id
+                self.next_id += 1
+                records[rec_id] = dict(vals)
+                ids.append(rec_id)
+            return ids if isinstance(values, list) else ids[0]
+        if method == 'write':
+            for rec_id in params[0]:
+                records[rec_id].update(params[1])
+            return True
+        raise ValueError(f"mock Odoo has no {model}.{method}")
+
+    def handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def send(self, body, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.path.startswith('/xmlrpc/2/'):
+                    params, method = xmlrpc.client.loads(raw)
+                    try:
+                        body = xmlrpc.client.dumps(
+                            (mock.call(self.path.rsplit('/', 1)[1], method,
+                                       list(params)),), methodresponse=True)
+                    except Exception as e:
+                        body = xmlrpc.client.dumps(
+                            xmlrpc.client.Fault(1, str(e)))
+                    return self.send(body.encode(), 'text/xml')
+
+                mock.requests += 1
+                time.sleep(mock.latency)
+                request = json.loads(raw or b'{}')
+                if isinstance(request, list) and mock.batch:
+                    response = [self.reply(item) for item in request]
+                elif isinstance(request, list):
+                    response = {'jsonrpc': '2.0', 'id': None,
+                                'error': {'code': 200, 'message': 'batch',
+                                          'data': {'message': 'batch'}}}
+                else:
+                    response = self.reply(request)
+                self.send(json.dumps(response).encode(), 'application/json')
+
+            def reply(self, request):
+                params = request.get('params', {})
+                try:
+                    if self.path == '/web/webclient/version_info':
+                        result = {'server_version': '16.0',
+                                  'server_version_info': [16, 0, 0, 'final', 0, '']}
+                    else:
+                        result = mock.call(params.get('service'),
+                                           params.get('method'),
+                                           params.get('args', []))
+                    return {'jsonrpc': '2.0', 'id': request.get('id'),
+                            'result': result}
+                except Exception as e:
+                    return {'jsonrpc': '2.0', 'id': request.get('id'),
+                            'error': {'code': 200, 'message': str(e),
+                                      'data': {'message': str(e)}}}
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class PeakRSS:
+    # Samples this process and everything it spawned (driver, browser)
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def sample(self):
+        me = psutil.Process()
+        total = 0
+        for proc in [me] + me.children(recursive=True):
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                continue
+        self.peak = max(self.peak, total)
+
+    def run(self):
+        while not self.stop.is_set():
+            self.sample()
+            self.stop.wait(self.interval)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+        self.sample()
+
+
+class DriverCommandCounter:
+    # Counts WebDriver commands, each one an HTTP round trip to chromedriver
+    def __init__(self):
+        from selenium.webdriver.remote.remote_connection import RemoteConnection
+        self.target = RemoteConnection
+        self.original = RemoteConnection.execute
+        self.count = 0
+
+    def __enter__(self):
+        counter = self
+
+        def execute(connection, command, params):
+            counter.count += 1
+            return counter.original(connection, command, params)
+
+        self.target.execute = execute
+        return self
+
+    def __exit__(self, *exc):
+        self.target.execute = self.original
+
+
+def configure(threecx, odoo, backend):
+    settings = {
+        'THREECX_URL': threecx.url, 'THREECX_USER': 'bench',
+        'THREECX_PASS': 'bench', 'THREECX_BACKEND': backend,
+        'ODOO_URL': odoo.url, 'ODOO_DB': 'bench', 'ODOO_USER': 'bench',
+        'ODOO_PASS': 'bench', 'THREECX_SESSION_KEY': None,
+        # The mock listens on a new port every time, nothing to reuse
+        'ODOO_SESSION_FILE': '',
+        # Fake bench calls must not land in the real capture archive
+        'CAPTURE_DIR': '',
+        # Nor should the mock's markup teach the production selector profile
+        'SELECTOR_PROFILE_FILE': '',
+    }
+    for name, value in settings.items():
+        setattr(scrapper, name, value)
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+
+
+def run_size(size, threecx, odoo, backend):
+    threecx.reset(generate_calls(size))
+    odoo.reset()
+    configure(threecx, odoo, backend)
+
+    scrapper.metrics.reset()
+    with PeakRSS() as rss, DriverCommandCounter() as commands:
+        started = time.perf_counter()
+        records = scrapper.scrape_3cx()
+        scraped = time.perf_counter()
+        confirmed = scrapper.push_to_odoo(records)
+        finished = time.perf_counter()
+
+    summary = scrapper.metrics.as_dict()
+    return {
+        'backend': backend,
+        'size': size,
+        'scraped': len(records),
+        'confirmed': len(confirmed),
+        'in_odoo': len(odoo.records),
+        'scrape_seconds': round(scraped - started, 3),
+        'push_seconds': round(finished - scraped, 3),
+        'wall_seconds': round(finished - started, 3),
+        'odoo_rpcs': odoo.rpc_count,
+        'odoo_requests': odoo.requests,
+        'odoo_latency_ms': summary['latency_ms'],
+        'odoo_calls': dict(odoo.calls),
+        'threecx_requests': threecx.requests,
+        'driver_commands': commands.count,
+        'peak_rss_mb': round(rss.peak / (1024 * 1024), 1),
+        'kb_transferred': round(
+            summary['counters'].get('bytes_transferred', 0) / 1024, 1),
+        'browser_rss_mb': summary['peaks'].get('browser_rss_mb', 0.0),
+        'phases': summary['phases'],
+        'counters': summary['counters'],
+    }
+
+
+def parse_row(cells, i=0):
+    # The per-row normalizer the scraper used before normalize_rows, kept as
+    # the reference the batch version is checked and timed against
+    cols = [(c or '').strip() for c in cells]
+    _logger.debug(f"Processing row {i+1} with {len(cols)} columns")
+
+    if len(cols) < 11:
+        _logger.warning(
+            f"Row {i+1} has insufficient columns ({len(cols)}), skipping")
+        return None
+
+    _call_time = cols[0]
+    call_time = None
+    if _call_time:
+        try:
+            call_time = datetime.strptime(
+                _call_time, "%m/%d/%Y %I:%M:%S %p")
+        except ValueError:
+            _logger.warning(f"Could not parse call time: {_call_time}")
+            return None
+
+    call_id = cols[1]
+    if not call_id:
+        _logger.warning(f"Row {i+1} has no call ID, skipping")
+        return None
+
+    _call_from = cols[2]
+    match = re.search(r'\((\d+)\)', _call_from)
+    call_from = match.group(1) if match else _call_from
+
+    call_to = cols[3]
+    call_type = cols[4].lower()
+    call_status = cols[5].lower()
+
+    ringing_time = scrapper.hms_to_ceil_float_hours(cols[7])
+    talking_time = scrapper.hms_to_ceil_float_hours(cols[8])
+
+    call_cost = cols[9]
+    call_activity_details = cols[10]
+
+    _logger.debug(f"Successfully processed row {i+1}: Call ID {call_id}")
+
+    return {
+        'call_id': call_id,
+        'call_from': call_from,
+        'call_to': call_to,
+        'call_time': call_time.strftime('%Y-%m-%d %H:%M:%S'),
+        'call_type': call_type,
+        'call_status': call_status,
+        'call_ringing_time': ringing_time,
+        'call_talking_time': talking_time,
+        'call_cost': call_cost,
+        'call_activity_details': call_activity_details,
+    }
+
+
+def parse_rows_per_row(raw_rows):
+    # What select_window_rows did before normalize_rows
+    records = []
+    for i, cells in enumerate(raw_rows):
+        try:
+            records.append(parse_row(cells, i))
+        except Exception:
+            records.append(None)
+    return records
+
+
+def bench_normalizer(raw_rows, repeat=5):
+    # Best of `repeat` passes for each implementation, with fresh caches so
+    # the batch normalizer gets no head start
+    if parse_rows_per_row(raw_rows) != scrapper.normalize_rows(raw_rows):
+        raise AssertionError("normalize_rows disagrees with parse_row")
+    results = []
+    for name, normalize in (('parse_row', parse_rows_per_row),
+                            ('normalize_rows', scrapper.normalize_rows)):
+        best = None
+        for _ in range(repeat):
+            for cached in (scrapper.iso_date, scrapper.ceil_hours,
+                           scrapper.caller_extension):
+                cached.cache_clear()
+            started = time.perf_counter()
+            normalize(raw_rows)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        results.append({'normalizer': name, 'rows': len(raw_rows),
+                        'seconds': round(best, 4),
+                        'rows_per_second': round(len(raw_rows) / best)})
+    print(f"{'normalizer':<15} {'rows':>8} {'best s':>8} {'rows/s':>10}")
+    for r in results:
+        print(f"{r['normalizer']:<15} {r['rows']:>8} {r['seconds']:>8.4f} "
+              f"{r['rows_per_second']:>10}")
+    print(f"speedup {results[0]['seconds'] / results[1]['seconds']:.1f}x")
+    return results
+
+
+def print_results(results):
+    print(f"{'backend':<10} {'rows':>6} {'scraped':>7} {'in odoo':>7} "
+          f"{'wall s':>7} {'scrape s':>8} {'push s':>7} {'rpcs':>5} "
+          f"{'odoo req':>8} {'3cx req':>7} {'driver':>6} {'KB in':>8} {'peak MB':>8} "
+          f"{'browser MB':>10}")
+    for r in results:
+        print(f"{r['backend']:<10} {r['size']:>6} {r['scraped']:>7} "
+              f"{r['in_odoo']:>7} {r['wall_seconds']:>7.2f} "
+              f"{r['scrape_seconds']:>8.2f} {r['push_seconds']:>7.2f} "
+              f"{r['odoo_rpcs']:>5} {r['odoo_requests']:>8} "
+              f"{r['threecx_requests']:>7} "
+              f"{r['driver_commands']:>6} {r['kb_transferred']:>8.1f} "
+              f"{r['peak_rss_mb']:>8.1f} {r['browser_rss_mb']:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark scrape_3cx and push_to_odoo against local "
+                    "mock 3CX and Odoo servers")
+    parser.add_argument('--sizes', default=BENCH_SIZES,
+                        help="comma separated call counts to benchmark")
+    parser.add_argument('--backends', default=scrapper.THREECX_BACKEND,
+                        help="comma separated backends to benchmark")
+    parser.add_argument('--page-size', type=int, default=BENCH_PAGE_SIZE,
+                        help="largest page size the mock report offers")
+    parser.add_argument('--latency-ms', type=float, default=BENCH_LATENCY_MS,
+                        help="delay the mock 3CX adds to every data request")
+    parser.add_argument('--odoo-latency-ms', type=float, default=0.0,
+                        help="delay the mock Odoo adds to every HTTP request")
+    parser.add_argument('--no-odoo-batch', action='store_true',
+                        help="make the mock Odoo refuse JSON-RPC batches")
+    parser.add_argument('--json', metavar='PATH',
+                        help="also write the results to this JSON file")
+    parser.add_argument('--serve', action='store_true',
+                        help="only start the mock servers, for manual runs")
+    parser.add_argument('--normalizer', type=int, metavar='ROWS',
+                        help="only time row normalization on this many "
+                             "generated rows, old per-row against batch")
+    parser.add_argument('--captures', nargs='+', metavar='PATH',
+                        help="with --normalizer, take the rows from capture "
+                             "archives instead (ROWS 0 means all of them)")
+    args = parser.parse_args(argv)
+
+    if args.normalizer is not None:
+        if args.captures:
+            raw_rows = [row for path in scrapper.capture_files(args.captures)
+                        for _, page in scrapper.iter_captured_pages(path)
+                        for row in page]
+            raw_rows = raw_rows[:args.normalizer or None]
+        else:
+            raw_rows = [call['cells'] for call in generate_calls(args.normalizer)]
+        results = bench_normalizer(raw_rows)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+        return
+
+    threecx = MockThreeCX(args.latency_ms, args.page_size)
+    odoo = MockOdoo(args.odoo_latency_ms, not args.no_odoo_batch)
+    threecx.start()
+    odoo.start()
+    try:
+        if args.serve:
+            threecx.reset(generate_calls(int(args.sizes.split(',')[0])))
+            print(f"Mock 3CX at {threecx.url}, mock Odoo at {odoo.url}")
+            threading.Event().wait()
+        results = []
+        for backend in args.backends.split(','):
+            for size in (int(s) for s in args.sizes.split(',')):
+                _logger.info(f"Benchmarking {backend} backend with {size} calls")
+                results.append(run_size(size, threecx, odoo, backend))
+        print_results(results)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        threecx.stop()
+        odoo.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+import argparse
+import csv
+import ipaddress
+import logging
+import os
+import queue
+import signal
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime, timezone
+
+from scrapper import (drain_outbox, enqueue_records, hms_to_ceil_float_hours,
+                      open_state_db)
+
+_logger = logging.getLogger("3cx_scraper.cdr")
+
+# ENV CONFIG
+CDR_HOST = os.getenv("CDR_HOST", "127.0.0.1")
+CDR_PORT = int(os.getenv("CDR_PORT", "5100"))
+# Peers (addresses or networks) allowed to send records; anything else is
+# dropped, since whatever arrives here ends up in Odoo. Set it to the 3CX
+# host when binding to an outside interface.
+CDR_ALLOWED_IPS = [
+    ipaddress.ip_network(ip.strip(), strict=False) for ip in os.getenv(
+        "CDR_ALLOWED_IPS", "127.0.0.1,::1").split(",") if ip.strip()]
+# Must match the field list configured under 3CX Settings > CDR
+CDR_FIELDS = os.getenv(
+    "CDR_FIELDS",
+    "historyid,callid,duration,time-start,time-answered,time-end,"
+    "reason-terminated,from-no,to-no,from-dn,to-dn,dial-no,reason-changed,"
+    "final-number,final-dn,bill-code,bill-rate,bill-cost,bill-name,chain,"
+    "from-type,to-type,final-type,from-dispname,to-dispname,final-dispname,"
+    "missed-queue-calls").split(",")
+CDR_CALL_ID_FIELD = os.getenv("CDR_CALL_ID_FIELD", "callid")
+CDR_TIME_FORMAT = os.getenv("CDR_TIME_FORMAT", "%Y/%m/%d %H:%M:%S")
+CDR_TIMES_UTC = os.getenv("CDR_TIMES_UTC", "1") == "1"
+CDR_BATCH_SIZE = int(os.getenv("CDR_BATCH_SIZE", "50"))
+CDR_FLUSH_SECONDS = float(os.getenv("CDR_FLUSH_SECONDS", "5"))
+# Failed flushes retried on shutdown before the batch is given up
+CDR_STOP_RETRIES = int(os.getenv("CDR_STOP_RETRIES", "3"))
+
+
+def parse_cdr_time(value):
+    if not value:
+        return None
+    call_time = datetime.strptime(value.strip(), CDR_TIME_FORMAT)
+    if CDR_TIMES_UTC:
+        call_time = call_time.replace(tzinfo=timezone.utc).astimezone()
+        call_time = call_time.replace(tzinfo=None)
+    return call_time
+
+
+def seconds_to_hms(seconds):
+    seconds = max(0, int(seconds))
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def parse_cdr_line(line):
+    # Maps one CDR line onto the record dict scrape_3cx produces
+    values = next(csv.reader([line.strip()]), [])
+    if not values:
+        return None
+    fields = dict(zip(CDR_FIELDS, values))
+
+    call_id = fields.get(CDR_CALL_ID_FIELD, '').strip()
+    started = parse_cdr_time(fields.get('time-start'))
+    if not call_id or not started:
+        _logger.warning(f"CDR line without call id or start time: {line!r}")
+        return None
+    answered = parse_cdr_time(fields.get('time-answered'))
+    ended = parse_cdr_time(fields.get('time-end')) or started
+
+    ringing_seconds = ((answered or ended) - started).total_seconds()
+    talking = fields.get('duration', '').strip() if answered else ''
+
+    from_type = fields.get('from-type', '').lower()
+    to_type = fields.get('to-type', '').lower()
+    if from_type == 'extension' and to_type != 'extension':
+        call_type = 'outbound'
+    elif to_type == 'extension' and from_type != 'extension':
+        call_type = 'inbound'
+    else:
+        call_type = 'internal'
+
+    return {
+        'call_id': call_id,
+        'call_from': fields.get('from-no') or fields.get('from-dn', ''),
+        'call_to': fields.get('to-no') or fields.get('dial-no', ''),
+        'call_time': started.strftime('%Y-%m-%d %H:%M:%S'),
+        'call_type': call_type,
+        'call_status': 'answered' if answered else 'unanswered',
+        'call_ringing_time': hms_to_ceil_float_hours(
+            seconds_to_hms(ringing_seconds)),
+        'call_talking_time': hms_to_ceil_float_hours(talking),
+        'call_cost': fields.get('bill-cost', ''),
+        'call_activity_details': fields.get('reason-terminated', ''),
+    }
+
+
+def run_writer(records, stop, batch_size=None, flush_seconds=None):
+    # Owns the state database and Odoo connection. Flushes when a batch is
+    # full or its oldest record has waited flush_seconds. A batch that could
+    # not be queued is kept and retried every flush_seconds.
+    batch_size = batch_size or CDR_BATCH_SIZE
+    flush_seconds = flush_seconds or CDR_FLUSH_SECONDS
+    state = open_state_db()
+    odoo = None
+    batch = []
+    batch_started = None
+    failures = 0
+    stop_failures = 0
+
+    while not (stop.is_set() and records.empty() and not batch):
+        # Short waits, so a stop is noticed without sitting out the interval
+        timeout = 0.5
+        if batch:
+            timeout = min(timeout, max(
+                0.0, batch_started + flush_seconds - time.monotonic()))
+        try:
+            batch.append(records.get(timeout=timeout))
+            batch_started = batch_started or time.monotonic()
+        except queue.Empty:
+            pass
+
+        due = batch and time.monotonic() - batch_started >= flush_seconds
+        # After a failed flush only the interval triggers the retry
+        ready = not failures and (len(batch) >= batch_size or stop.is_set())
+        if batch and (due or ready):
+            _logger.info(f"Flushing {len(batch)} CDR records")
+            try:
+                enqueue_records(state, batch)
+            except Exception as e:
+                failures += 1
+                _logger.error(f"Error queueing {len(batch)} CDR records: {e}")
+                stop_failures += stop.is_set()
+                if stop_failures >= CDR_STOP_RETRIES:
+                    _logger.error(f"Giving up on {len(batch)} CDR records")
+                    break
+                batch_started = time.monotonic()
+                continue
+            failures = 0
+            batch = []
+            batch_started = None
+            try:
+                odoo = drain_outbox(state, odoo, max_wait=0)['odoo']
+            except Exception as e:
+                # The records are in the outbox, a later drain sends them
+                _logger.error(f"Error draining the outbox: {e}")
+                odoo = None
+
+    state.close()
+
+
+def peer_allowed(address):
+    ip = ipaddress.ip_address(address)
+    return any(ip in network for network in CDR_ALLOWED_IPS)
+
+
+def make_handler(records):
+    class CDRHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            if not peer_allowed(self.client_address[0]):
+                _logger.warning(
+                    f"Dropping CDR connection from {self.client_address}, "
+                    f"not in CDR_ALLOWED_IPS")
+                return
+            _logger.info(f"CDR connection from {self.client_address}")
+            for raw in self.rfile:
+                line = raw.decode('utf-8', errors='replace').strip()
+                if not line:
+                    continue
+                try:
+                    record = parse_cdr_line(line)
+                except Exception as e:
+                    _logger.error(f"Error parsing CDR line {line!r}: {e}")
+                    continue
+                if record:
+                    _logger.debug(f"CDR record {record['call_id']}")
+                    records.put(record)
+            _logger.info(f"CDR connection from {self.client_address} closed")
+
+    return CDRHandler
+
+
+def interrupt(signum, frame):
+    # SIGTERM (systemd, docker stop) shuts down like Ctrl-C, so the writer
+    # still flushes its last batch
+    raise KeyboardInterrupt
+
+
+def listen(host=None, port=None):
+    host = host or CDR_HOST
+    port = port or CDR_PORT
+    records = queue.Queue()
+    stop = threading.Event()
+    writer = threading.Thread(target=run_writer, args=(records, stop),
+                              name="cdr-writer")
+    writer.start()
+
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    server = socketserver.ThreadingTCPServer((host, port), make_handler(records))
+    server.daemon_threads = True
+    _logger.info(f"Listening for 3CX CDR records on {host}:{port}")
+    signal.signal(signal.SIGTERM, interrupt)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        _logger.info("CDR listener stopping")
+    finally:
+        server.server_close()
+        stop.set()
+        writer.join()
+
+
+def replay(path, host='127.0.0.1', port=None, rate=0.0):
+    # Test harness: sends a CDR fixture to a listener the way 3CX would,
+    # optionally throttled to `rate` lines per second
+    port = port or CDR_PORT
+    sent = 0
+    with socket.create_connection((host, port)) as sock, \
+            open(path, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            sock.sendall(line.rstrip(b'\r\n') + b'\r\n')
+            sent += 1
+            if rate:
+                time.sleep(1.0 / rate)
+    _logger.info(f"Replayed {sent} CDR lines from {path} to {host}:{port}")
+    return sent
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Receive 3CX CDR records over TCP and push them to Odoo")
+    commands = parser.add_subparsers(dest='command', required=True)
+    listen_cmd = commands.add_parser('listen', help="accept the CDR stream")
+    listen_cmd.add_argument('--host', default=CDR_HOST)
+    listen_cmd.add_argument('--port', type=int, default=CDR_PORT)
+    replay_cmd = commands.add_parser(
+        'replay', help="send a CDR fixture file to a running listener")
+    replay_cmd.add_argument('path')
+    replay_cmd.add_argument('--host', default='127.0.0.1')
+    replay_cmd.add_argument('--port', type=int, default=CDR_PORT)
+    replay_cmd.add_argument('--rate', type=float, default=0.0,
+                            help="lines per second, 0 for as fast as possible")
+    args = parser.parse_args()
+
+    if args.command == 'listen':
+        listen(args.host, args.port)
+    else:
+        replay(args.path, args.host, args.port, args.rate)
@@ -1,16 +1,41 @@
 import math
 import time
+import argparse
+import random
+import signal
+import threading
+import multiprocessing
+import queue
+import csv
+import gzip
+import glob
+import itertools
+import shutil
+import fcntl
+import tempfile
 import re
 import logging
-from datetime import datetime
+from contextlib import contextmanager
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta, timezone
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import odoorpc
+from selenium.common.exceptions import TimeoutException
+from cryptography.fernet import Fernet, InvalidToken
+from playwright.sync_api import sync_playwright
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 import os
+import psutil
+import requests
+import urllib3
+from urllib.parse import urlparse
+import json
+import hashlib
+import sqlite3
 from selenium.webdriver.chrome.service import Service
 
 # logging
@@ -26,6 +51,91 @@ ODOO_PASS = os.getenv("ODOO_PASS")
 THREECX_URL = os.getenv("THREECX_URL")
 THREECX_USER = os.getenv("THREECX_USER")
 THREECX_PASS = os.getenv("THREECX_PASS")
+ODOO_BATCH_SIZE = int(os.getenv("ODOO_BATCH_SIZE", "100"))
+# Odoo JSON-RPC transport: uid cache reused across runs (empty disables it),
+# whether several execute_kw calls may share one request (auto probes the
+# server once), how many at most, and the per-request timeout
+ODOO_SESSION_FILE = os.getenv("ODOO_SESSION_FILE", "odoo_session.json")
+ODOO_RPC_BATCH = os.getenv("ODOO_RPC_BATCH", "auto")
+ODOO_RPC_BATCH_CALLS = int(os.getenv("ODOO_RPC_BATCH_CALLS", "10"))
+ODOO_RPC_TIMEOUT = float(os.getenv("ODOO_RPC_TIMEOUT", "60"))
+# script: one execute_script call, cells: legacy per-cell reads, compare: both
+THREECX_EXTRACT_MODE = os.getenv("THREECX_EXTRACT_MODE", "script")
+# Which of the candidate selectors matched on this 3CX instance, tried first
+# on the next run (empty disables it)
+SELECTOR_PROFILE_FILE = os.getenv("SELECTOR_PROFILE_FILE", "selector_profile.json")
+THREECX_WINDOW_HOURS = float(os.getenv("THREECX_WINDOW_HOURS", "24"))
+THREECX_MAX_PAGES = int(os.getenv("THREECX_MAX_PAGES", "200"))
+# Calls this far behind the high-water mark are read again on every run so
+# later changes to their status, durations or cost still reach Odoo
+THREECX_RESCAN_MINUTES = float(os.getenv("THREECX_RESCAN_MINUTES", "30"))
+STATE_DB = os.getenv("STATE_DB", "scraper_state.db")
+# Overall time allowed for all browser waits of one run, and the cap per wait
+RUN_BUDGET_SECONDS = float(os.getenv("RUN_BUDGET_SECONDS", "300"))
+WAIT_TIMEOUT_SECONDS = float(os.getenv("WAIT_TIMEOUT_SECONDS", "30"))
+# Fernet key; when unset, every run does the full login
+THREECX_SESSION_KEY = os.getenv("THREECX_SESSION_KEY")
+THREECX_SESSION_FILE = os.getenv("THREECX_SESSION_FILE", "3cx_session.bin")
+DAEMON_INTERVAL_SECONDS = float(os.getenv("DAEMON_INTERVAL_SECONDS", "60"))
+DAEMON_JITTER_SECONDS = float(os.getenv("DAEMON_JITTER_SECONDS", "10"))
+DAEMON_MAX_BROWSER_RSS_MB = float(os.getenv("DAEMON_MAX_BROWSER_RSS_MB", "1024"))
+# Scraped pages allowed to wait for the Odoo writer before scraping pauses
+PIPELINE_QUEUE_PAGES = int(os.getenv("PIPELINE_QUEUE_PAGES", "2"))
+# table: read the report DOM, export: download the CSV export (table fallback)
+THREECX_INGEST_MODE = os.getenv("THREECX_INGEST_MODE", "table")
+EXPORT_TIMEOUT_SECONDS = float(os.getenv("EXPORT_TIMEOUT_SECONDS", "120"))
+# selenium (or browser), playwright, api (no browser), or auto: playwright
+# falling back to selenium
+THREECX_BACKEND = os.getenv("THREECX_BACKEND", "selenium")
+THREECX_API_LOGIN_PATH = os.getenv(
+    "THREECX_API_LOGIN_PATH", "/webclient/api/Login/GetAccessToken")
+THREECX_API_CALL_LOG_PATH = os.getenv(
+    "THREECX_API_CALL_LOG_PATH",
+    "/xapi/v1/ReportCallLogData/Pbx.GetCallLogData(periodFrom={since},"
+    "periodTo={until},sourceType=0,sourceFilter='',destinationType=0,"
+    "destinationFilter='',callsType=0,callTimeFilterType=0,"
+    "callTimeFilterFrom='0:00:0',callTimeFilterTo='0:00:0',hidePcalls=true)")
+THREECX_API_CALL_ID_FIELD = os.getenv("THREECX_API_CALL_ID_FIELD", "CallHistoryId")
+THREECX_API_PAGE_SIZE = int(os.getenv("THREECX_API_PAGE_SIZE", "500"))
+THREECX_API_TIMEOUT = float(os.getenv("THREECX_API_TIMEOUT", "30"))
+# lean blocks images, fonts, media, analytics and third-party hosts, keeps a
+# disk cache of the SPA bundle across runs and caps renderer memory;
+# standard loads everything
+THREECX_BROWSER_PROFILE = os.getenv("THREECX_BROWSER_PROFILE", "lean")
+BROWSER_CACHE_DIR = os.getenv("BROWSER_CACHE_DIR", ".browser_cache")
+BROWSER_CACHE_MB = int(os.getenv("BROWSER_CACHE_MB", "100"))
+BROWSER_RENDERER_HEAP_MB = int(os.getenv("BROWSER_RENDERER_HEAP_MB", "256"))
+# Extra hosts besides the 3CX one the lean profile lets through
+BROWSER_ALLOWED_HOSTS = [h for h in os.getenv(
+    "BROWSER_ALLOWED_HOSTS", "").split(",") if h]
+# Retry schedule for outbox rows Odoo did not acknowledge
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "2"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "900"))
+OUTBOX_MAX_WAIT_SECONDS = float(os.getenv("OUTBOX_MAX_WAIT_SECONDS", "120"))
+OUTBOX_RETENTION_DAYS = float(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+# Local index of call_ids known to be in Odoo: how far back it is kept and
+# how often it is re-synced against logs.3cx
+KNOWN_CALLS_RETENTION_HOURS = float(os.getenv("KNOWN_CALLS_RETENTION_HOURS", "48"))
+KNOWN_CALLS_RECONCILE_HOURS = float(os.getenv("KNOWN_CALLS_RECONCILE_HOURS", "6"))
+# Per-extension daily rollups: the Odoo model they are upserted to (empty
+# keeps them local only), and how long per-call facts are kept so a day can
+# be recomputed; days that old are final
+ODOO_AGGREGATE_MODEL = os.getenv("ODOO_AGGREGATE_MODEL", "")
+AGGREGATE_RETENTION_DAYS = int(os.getenv("AGGREGATE_RETENTION_DAYS", "62"))
+# Historical backfill: chunk size (day|week), worker count (0 sizes it to the
+# host) and the memory one worker's browser is expected to need
+BACKFILL_CHUNK = os.getenv("BACKFILL_CHUNK", "day")
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", "0"))
+BACKFILL_MB_PER_WORKER = float(os.getenv("BACKFILL_MB_PER_WORKER", "600"))
+# Raw cell arrays of every scraped page, as gzipped JSONL per capture day,
+# for replay without 3CX (empty disables); 0 days keeps them forever
+CAPTURE_DIR = os.getenv("CAPTURE_DIR", "captures")
+CAPTURE_RETENTION_DAYS = int(os.getenv("CAPTURE_RETENTION_DAYS", "90"))
+# Per-run metrics: JSON summary, and a Prometheus textfile if a path is set
+METRICS_JSON_PATH = os.getenv("METRICS_JSON_PATH", "scraper_metrics.json")
+METRICS_PROM_PATH = os.getenv("METRICS_PROM_PATH")
+# Multi-tenant runs: a tenant still running after this is killed
+TENANT_TIMEOUT_SECONDS = float(os.getenv("TENANT_TIMEOUT_SECONDS", "600"))
 
 
 def hms_to_ceil_float_hours(time_str):
@@ -40,15 +150,1473 @@ def hms_to_ceil_float_hours(time_str):
         return 0.0
 
 
-def scrape_3cx():
-    sleep_time = 10  # Reduced initial sleep time
-    timeout_time = 30  # Reduced timeout
-    today = datetime.today()
-    login_url = THREECX_URL.rstrip('/') + "/#/login"
-    report_url = THREECX_URL.rstrip('/') + "/#/office/reports/call-reports"
-    data_rows = []
+ISO_DURATION_RE = re.compile(
+    r'^P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?$')
+
+
+# Pulls the header labels and the text of every cell of the report table in
+# one WebDriver call
+EXTRACT_ROWS_JS = """
+var cells = function (tr, tag) {
+    return Array.from(tr.querySelectorAll(tag)).map(function (td) {
+        return td.innerText;
+    });
+};
+var head = document.querySelector('table thead tr');
+return {
+    header: head ? cells(head, 'th, td') : [],
+    rows: Array.from(document.querySelectorAll('table tbody tr')).map(
+        function (tr) { return cells(tr, 'td'); })
+};
+"""
+
+
+def extract_rows_script(driver):
+    # Returns (header labels, raw rows)
+    table = driver.execute_script(EXTRACT_ROWS_JS) or {}
+    return table.get('header') or [], table.get('rows') or []
+
+
+def extract_rows_per_cell(driver):
+    # One chromedriver round trip per row plus one per cell, kept for comparison
+    header = [th.text for th in driver.find_elements(
+        By.CSS_SELECTOR, 'table thead tr th')]
+    rows = driver.find_elements(By.CSS_SELECTOR, 'table tbody tr')
+    return header, [[col.text for col in row.find_elements(By.TAG_NAME, 'td')]
+                    for row in rows]
+
+
+def compare_extraction_modes(driver):
+    started = time.perf_counter()
+    _, cell_rows = extract_rows_per_cell(driver)
+    cells_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    header, script_rows = extract_rows_script(driver)
+    script_elapsed = time.perf_counter() - started
+
+    _logger.info(
+        f"Extraction timing: per-cell {cells_elapsed:.3f}s for {len(cell_rows)} rows, "
+        f"execute_script {script_elapsed:.3f}s for {len(script_rows)} rows "
+        f"({cells_elapsed / max(script_elapsed, 1e-6):.1f}x)")
+    if [[c.strip() for c in r] for r in cell_rows] != \
+            [[c.strip() for c in r] for r in script_rows]:
+        _logger.warning("Per-cell and execute_script extraction disagree")
+    return header, script_rows
+
+
+# Header labels (lower case, punctuation dropped) each position of the row
+# layout normalize_rows reads may carry; position 6 is not used
+REPORT_COLUMNS = [
+    ['call time', 'time', 'date', 'start time', 'started', 'date time'],
+    ['call id', 'id', 'call history id', 'history id'],
+    ['from', 'caller', 'source', 'caller id'],
+    ['to', 'destination', 'callee', 'dialed'],
+    ['direction', 'type', 'call type'],
+    ['status', 'result', 'call status'],
+    [],
+    ['ringing', 'ringing time', 'ring time', 'ringing duration'],
+    ['talking', 'talking time', 'talk time', 'talking duration'],
+    ['cost', 'call cost', 'billing cost'],
+    ['call activity details', 'activity details', 'details', 'activity',
+     'reason'],
+]
+HEADER_LABEL_RE = re.compile(r'[^a-z0-9]+')
+# Header -> column positions, so each distinct header is resolved only once
+_column_maps = {}
+
+
+def report_column_map(header):
+    # For every position normalize_rows reads, the index of the matching header
+    # column (None when the report lacks it). None when rows can keep their
+    # positional layout: the header already matches it, or is missing or
+    # unrecognizable.
+    key = tuple(header)
+    if key not in _column_maps:
+        labels = [HEADER_LABEL_RE.sub(' ', label.lower()).strip()
+                  for label in header]
+        mapping = []
+        for aliases in REPORT_COLUMNS:
+            mapping.append(next((labels.index(alias) for alias in aliases
+                                 if alias in labels), None))
+        if mapping[0] is None or mapping[1] is None:
+            if header:
+                _logger.warning(
+                    f"Report header {header} not recognized, reading columns "
+                    f"by position")
+            mapping = None
+        elif all(index == position for position, index in enumerate(mapping)
+                 if REPORT_COLUMNS[position]):
+            # Already in normalize_rows' layout
+            mapping = None
+        else:
+            _logger.info(f"Report columns mapped by header: {mapping}")
+        _column_maps[key] = mapping
+    return _column_maps[key]
+
+
+def map_report_columns(header, raw_rows):
+    # Reorders rows into normalize_rows' layout. Rows too short for the
+    # header (placeholders such as "no data") are left for it to reject.
+    mapping = report_column_map(header)
+    if mapping is None:
+        return raw_rows
+    width = max(index for index in mapping if index is not None) + 1
+    return [[row[index] if index is not None else '' for index in mapping]
+            if len(row) >= width else row for row in raw_rows]
+
+
+# Fixed layout of the report's call time, "10/17/2026 01:05:09 PM"
+CALL_TIME_RE = re.compile(
+    r'(\d{1,2})/(\d{1,2})/(\d{4}) (\d{1,2}):(\d{1,2}):(\d{1,2}) ([AaPp][Mm])$')
+CALLER_EXTENSION_RE = re.compile(r'\((\d+)\)')
+
+
+@lru_cache(maxsize=4096)
+def iso_date(month, day, year):
+    # A page holds a handful of distinct days, so each is validated once
+    try:
+        return date(int(year), int(month), int(day)).isoformat()
+    except ValueError:
+        return None
+
+
+def parse_call_time(value):
+    # "%m/%d/%Y %I:%M:%S %p" -> "%Y-%m-%d %H:%M:%S" without building a
+    # datetime; anything off the fast path goes through strptime, so the
+    # result and the rejects are the same
+    match = CALL_TIME_RE.match(value)
+    if match:
+        month, day, year, hour, minute, second, meridiem = match.groups()
+        day_str = iso_date(month, day, year)
+        hour, minute, second = int(hour), int(minute), int(second)
+        if day_str and 1 <= hour <= 12 and minute < 60 and second < 60:
+            if meridiem in ('PM', 'pm', 'Pm', 'pM'):
+                hour = hour % 12 + 12
+            else:
+                hour %= 12
+            return f"{day_str} {hour:02d}:{minute:02d}:{second:02d}"
+    return datetime.strptime(value, "%m/%d/%Y %I:%M:%S %p").strftime(
+        '%Y-%m-%d %H:%M:%S')
+
+
+# Ring and talk times repeat a lot across calls, and so do extensions
+ceil_hours = lru_cache(maxsize=8192)(hms_to_ceil_float_hours)
+
+
+@lru_cache(maxsize=8192)
+def caller_extension(value):
+    match = CALLER_EXTENSION_RE.search(value)
+    return match.group(1) if match else value
+
+
+def normalize_rows(raw_rows):
+    # Turns raw rows in the report's column layout into records, a whole
+    # page at a time with the per-row work cached or precompiled; rejects
+    # come back as None. Records stay plain dicts since they go straight to
+    # JSON and Odoo. bench_3cx keeps the old per-row parser as a reference.
+    records = []
+    append = records.append
+    for i, cells in enumerate(raw_rows):
+        if len(cells) < 11:
+            _logger.warning(
+                f"Row {i+1} has insufficient columns ({len(cells)}), skipping")
+            append(None)
+            continue
+        try:
+            call_time = (cells[0] or '').strip()
+            call_id = (cells[1] or '').strip()
+            if call_time:
+                try:
+                    call_time = parse_call_time(call_time)
+                except ValueError:
+                    _logger.warning(f"Could not parse call time: {call_time}")
+                    append(None)
+                    continue
+            if not call_id:
+                _logger.warning(f"Row {i+1} has no call ID, skipping")
+                append(None)
+                continue
+            if not call_time:
+                raise ValueError("no call time")
+            append({
+                'call_id': call_id,
+                'call_from': caller_extension((cells[2] or '').strip()),
+                'call_to': (cells[3] or '').strip(),
+                'call_time': call_time,
+                'call_type': (cells[4] or '').strip().lower(),
+                'call_status': (cells[5] or '').strip().lower(),
+                'call_ringing_time': ceil_hours((cells[7] or '').strip()),
+                'call_talking_time': ceil_hours((cells[8] or '').strip()),
+                'call_cost': (cells[9] or '').strip(),
+                'call_activity_details': (cells[10] or '').strip(),
+            })
+        except Exception as e:
+            _logger.error(f"Error processing row {i+1}: {e}")
+            append(None)
+    return records
+
+
+# Selectors tried in order for the report filters and pager
+DATE_FROM_SELECTORS = [
+    'input[formcontrolname="from"]',
+    'input[formcontrolname="periodFrom"]',
+    'input[name="from"]',
+    'input[placeholder*="From"]',
+    'input[type="date"]:first-of-type',
+]
+DATE_TO_SELECTORS = [
+    'input[formcontrolname="to"]',
+    'input[formcontrolname="periodTo"]',
+    'input[name="to"]',
+    'input[placeholder*="To"]',
+    'input[type="date"]:last-of-type',
+]
+APPLY_FILTER_SELECTORS = [
+    'button[type="submit"]',
+    'button.btn-primary',
+]
+PAGE_SIZE_SELECTORS = [
+    'select[name*="pageSize"]',
+    'select[name*="page-size"]',
+    '.pagination select',
+    'pagination select',
+    'select.page-size',
+]
+EXPORT_SELECTORS = [
+    'button[title*="Export"]',
+    'button[aria-label*="Export"]',
+    'button[data-qa="export"]',
+    'button.export',
+    'a[title*="Export"]',
+]
+EXPORT_CSV_SELECTORS = [
+    'a[title*="CSV"]',
+    'button[title*="CSV"]',
+    '[data-qa="export-csv"]',
+]
+NEXT_PAGE_SELECTORS = [
+    'li.pagination-next a',
+    'li.page-item.next a',
+    'button[aria-label="Next page"]',
+    'a[aria-label="Next"]',
+    'button[aria-label="Next"]',
+    '.pagination .next',
+]
+
+# Login form selectors; entries starting with / are XPath
+LOGIN_USER_SELECTORS = [
+    '#loginInput',
+    'input[name="username"]',
+    'input[name="login"]',
+    'input[type="text"]',
+    'input[placeholder*="user" i]',
+    'input[placeholder*="name" i]',
+]
+LOGIN_PASSWORD_SELECTORS = [
+    '#passwordInput',
+    'input[name="password"]',
+    'input[type="password"]',
+    'input[placeholder*="pass" i]',
+]
+LOGIN_SUBMIT_SELECTORS = [
+    '#submitBtn',
+    'button[type="submit"]',
+    'input[type="submit"]',
+    "//button[contains(text(), 'Login')]",
+    "//button[contains(text(), 'Sign')]",
+]
+
+# Index of the first selector, in order, matching a visible element, or -1.
+# With arguments[1] set, returns [index, element] instead.
+FIRST_MATCH_JS = """
+var selectors = arguments[0];
+for (var i = 0; i < selectors.length; i++) {
+    var found = [];
+    try {
+        if (selectors[i].charAt(0) === '/') {
+            var snapshot = document.evaluate(selectors[i], document, null,
+                XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var j = 0; j < snapshot.snapshotLength; j++) {
+                found.push(snapshot.snapshotItem(j));
+            }
+        } else {
+            found = document.querySelectorAll(selectors[i]);
+        }
+    } catch (e) {
+        continue;
+    }
+    for (var k = 0; k < found.length; k++) {
+        if (found[k].getClientRects().length && !found[k].disabled) {
+            return arguments[1] ? [i, found[k]] : i;
+        }
+    }
+}
+return arguments[1] ? null : -1;
+"""
+
+
+class SelectorProfile:
+    # Remembers which candidate selector matched for each control of this
+    # 3CX instance, so the next run tries it first and usually matches on
+    # the first probe
+    def __init__(self):
+        self.source = None
+        self.learned = {}
+
+    def load(self):
+        if self.source == (SELECTOR_PROFILE_FILE, THREECX_URL):
+            return
+        self.source = (SELECTOR_PROFILE_FILE, THREECX_URL)
+        self.learned = {}
+        if not SELECTOR_PROFILE_FILE:
+            return
+        try:
+            with open(SELECTOR_PROFILE_FILE) as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            return
+        if profile.get('url') == THREECX_URL:
+            self.learned = profile.get('selectors', {})
+
+    def ordered(self, key, selectors):
+        self.load()
+        best = self.learned.get(key)
+        if best not in selectors:
+            return list(selectors)
+        return [best] + [selector for selector in selectors if selector != best]
+
+    def remember(self, key, selector):
+        self.load()
+        if self.learned.get(key) == selector:
+            return
+        self.learned[key] = selector
+        if not SELECTOR_PROFILE_FILE:
+            return
+        try:
+            write_atomic(SELECTOR_PROFILE_FILE, json.dumps(
+                {'url': THREECX_URL, 'selectors': self.learned}, indent=2))
+        except OSError as e:
+            _logger.warning(f"Could not save the selector profile: {e}")
+
+
+selector_profile = SelectorProfile()
+
+# Sets an input's value the way a user edit would, so Angular picks it up
+SET_INPUT_JS = """
+var el = arguments[0];
+var value = el.type === 'date' ? arguments[1] : arguments[2];
+var setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+setter.call(el, value);
+['input', 'change', 'blur'].forEach(function (name) {
+    el.dispatchEvent(new Event(name, {bubbles: true}));
+});
+"""
+
+# Picks the largest numeric option of a page-size select
+MAX_PAGE_SIZE_JS = """
+var sel = arguments[0], best = null, bestSize = -1;
+Array.from(sel.options).forEach(function (o) {
+    var size = parseInt(o.value || o.text, 10);
+    if (!isNaN(size) && size > bestSize) { best = o; bestSize = size; }
+});
+if (!best) { return null; }
+sel.value = best.value;
+sel.dispatchEvent(new Event('change', {bubbles: true}));
+return bestSize;
+"""
+
+NEXT_DISABLED_JS = """
+var el = arguments[0];
+return el.disabled || !!el.closest('.disabled, [aria-disabled="true"]');
+"""
+
+FIRST_ROW_TEXT_JS = """
+var row = document.querySelector('table tbody tr');
+return row ? row.innerText : null;
+"""
+
+
+def find_first_element(driver, selectors, key=None):
+    # One round trip whatever the number of candidates; a match is learned
+    # under key
+    selectors = selector_profile.ordered(key, selectors)
+    match = driver.execute_script(FIRST_MATCH_JS, selectors, True)
+    if not match:
+        return None
+    index, element = match
+    if key:
+        selector_profile.remember(key, selectors[index])
+    return element
+
+
+def first_element_ready(selectors, key=None):
+    # Wait condition probing every candidate on each poll, instead of one
+    # timeout per selector
+    def condition(driver):
+        return find_first_element(driver, selectors, key) or False
+    return condition
+
+
+class LatencyBudget:
+    # Shared deadline for every readiness wait of a run. Each wait is capped
+    # by both its own timeout and whatever is left of the run's budget.
+    def __init__(self, seconds=None, wait_timeout=None):
+        self.seconds = seconds or RUN_BUDGET_SECONDS
+        self.wait_timeout = wait_timeout or WAIT_TIMEOUT_SECONDS
+        self.deadline = time.monotonic() + self.seconds
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def wait(self, driver, condition, label, timeout=None):
+        timeout = min(timeout or self.wait_timeout, self.remaining())
+        started = time.perf_counter()
+        try:
+            result = WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+                condition)
+            _logger.info(
+                f"Waited {time.perf_counter() - started:.2f}s for {label}")
+            return result
+        except TimeoutException:
+            _logger.warning(
+                f"Gave up on {label} after {time.perf_counter() - started:.2f}s "
+                f"({self.remaining():.0f}s of run budget left)")
+            raise
+
+
+class RunMetrics:
+    # Phase timers, counters and peak memory of one run. Phases may nest
+    # (odoo_create runs inside outbox_drain), so they do not add up to the
+    # run's wall time. Shared with the pipeline's writer thread.
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.counters = {}
+        self.peaks = {}
+        self.latencies = {}
+        self.peak_rss = 0
+        self.sample_memory()
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+            self.sample_memory()
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def peak(self, name, value):
+        with self.lock:
+            self.peaks[name] = max(self.peaks.get(name, 0), value)
+
+    def latency(self, name, seconds):
+        with self.lock:
+            self.latencies.setdefault(name, []).append(seconds)
+
+    def latency_summary(self):
+        # Nearest-rank percentiles, in milliseconds
+        summary = {}
+        for name, samples in self.latencies.items():
+            samples = sorted(samples)
+            summary[name] = {'count': len(samples)}
+            for label, q in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99),
+                             ('max', 1.0)):
+                rank = max(0, math.ceil(q * len(samples)) - 1)
+                summary[name][label] = round(samples[rank] * 1000, 2)
+        return summary
+
+    def sample_memory(self):
+        # This process plus the driver and browser it spawned
+        try:
+            me = psutil.Process()
+            procs = [me] + me.children(recursive=True)
+        except psutil.Error:
+            return
+        total = 0
+        for proc in procs:
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                continue
+        self.peak_rss = max(self.peak_rss, total)
+
+    def as_dict(self, **extra):
+        self.sample_memory()
+        with self.lock:
+            return dict(extra,
+                        started_at=datetime.fromtimestamp(
+                            self.started_at).isoformat(timespec='seconds'),
+                        seconds=round(time.perf_counter() - self.started, 3),
+                        phases={k: round(v, 3) for k, v in self.phases.items()},
+                        counters=dict(self.counters),
+                        peaks={k: round(v, 1) for k, v in self.peaks.items()},
+                        latency_ms=self.latency_summary(),
+                        peak_rss_mb=round(self.peak_rss / (1024 * 1024), 1))
+
+    def write(self, json_path=None, prom_path=None, **extra):
+        # Both files are replaced atomically so collectors never read half
+        json_path = json_path or METRICS_JSON_PATH
+        prom_path = prom_path or METRICS_PROM_PATH
+        summary = self.as_dict(**extra)
+        if json_path:
+            write_atomic(json_path, json.dumps(summary, indent=2) + "\n")
+        if prom_path:
+            write_atomic(prom_path, self.prometheus_text(summary))
+        return summary
+
+    def prometheus_text(self, summary):
+        instance = (THREECX_URL or '').replace('\\', '\\\\').replace('"', '\\"')
+        label = f'threecx="{instance}"'
+        lines = [
+            "# HELP threecx_scraper_run_seconds Wall time of the last run.",
+            "# TYPE threecx_scraper_run_seconds gauge",
+            f"threecx_scraper_run_seconds{{{label}}} {summary['seconds']}",
+            "# HELP threecx_scraper_run_timestamp_seconds Start of the last run.",
+            "# TYPE threecx_scraper_run_timestamp_seconds gauge",
+            f"threecx_scraper_run_timestamp_seconds{{{label}}} {self.started_at:.0f}",
+            "# HELP threecx_scraper_phase_seconds Time spent per phase in the last run.",
+            "# TYPE threecx_scraper_phase_seconds gauge",
+        ]
+        lines += [f'threecx_scraper_phase_seconds{{{label},phase="{name}"}} {value}'
+                  for name, value in sorted(summary['phases'].items())]
+        lines += [
+            "# HELP threecx_scraper_events Rows, records and RPCs counted in the last run.",
+            "# TYPE threecx_scraper_events gauge",
+        ]
+        lines += [f'threecx_scraper_events{{{label},event="{name}"}} {value}'
+                  for name, value in sorted(summary['counters'].items())]
+        lines += [
+            "# HELP threecx_scraper_peak_rss_bytes Peak RSS of the scraper and its browser.",
+            "# TYPE threecx_scraper_peak_rss_bytes gauge",
+            f"threecx_scraper_peak_rss_bytes{{{label}}} {self.peak_rss}",
+            "# HELP threecx_scraper_peak Highest sampled value in the last run.",
+            "# TYPE threecx_scraper_peak gauge",
+        ]
+        lines += [f'threecx_scraper_peak{{{label},name="{name}"}} {value}'
+                  for name, value in sorted(summary['peaks'].items())]
+        lines += [
+            "# HELP threecx_scraper_latency_seconds Per-call latency percentiles in the last run.",
+            "# TYPE threecx_scraper_latency_seconds gauge",
+        ]
+        lines += [f'threecx_scraper_latency_seconds{{{label},call="{name}",'
+                  f'quantile="{quantile}"}} {value / 1000}'
+                  for name, values in sorted(summary['latency_ms'].items())
+                  for quantile, value in (('0.5', values['p50']),
+                                          ('0.9', values['p90']),
+                                          ('0.99', values['p99']))]
+        if 'complete' in summary:
+            lines += [
+                "# HELP threecx_scraper_run_complete Whether the last run reached the window start.",
+                "# TYPE threecx_scraper_run_complete gauge",
+                f"threecx_scraper_run_complete{{{label}}} {int(bool(summary['complete']))}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def write_atomic(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# Metrics of the run in progress, reset at the start of every run
+metrics = RunMetrics()
+
+
+def left_login_route(driver):
+    return '/#/login' not in driver.current_url
+
+
+class rows_stable:
+    # True once the row count is non-zero and unchanged for `settle` seconds
+    def __init__(self, settle=0.5):
+        self.settle = settle
+        self.count = None
+        self.changed_at = None
+
+    def __call__(self, driver):
+        count = driver.execute_script(
+            "return document.querySelectorAll('table tbody tr').length")
+        now = time.monotonic()
+        if count != self.count:
+            self.count = count
+            self.changed_at = now
+            return False
+        return count if count and now - self.changed_at >= self.settle else False
+
+
+def wait_for_report_table(driver, budget):
+    # Wait for loading to complete
+    try:
+        budget.wait(driver, EC.invisibility_of_element_located(
+            (By.CSS_SELECTOR, '.loading')), "loading spinner to clear")
+    except TimeoutException:
+        _logger.warning(
+            "Loading element not found or didn't disappear, continuing...")
+
+    # Wait for table rows to appear and stop changing
+    try:
+        count = budget.wait(driver, rows_stable(), "stable table rows")
+        _logger.info(f"Table found with {count} rows")
+        return True
+    except TimeoutException:
+        _logger.error("Table not found within timeout")
+        _logger.info(f"Page source: {driver.page_source}")
+        return False
+
+
+def set_report_filters(driver, since, until, budget):
+    from_input = find_first_element(driver, DATE_FROM_SELECTORS, 'date_from')
+    to_input = find_first_element(driver, DATE_TO_SELECTORS, 'date_to')
+    if from_input and to_input:
+        driver.execute_script(SET_INPUT_JS, from_input,
+                              since.strftime('%Y-%m-%d'), since.strftime('%m/%d/%Y'))
+        driver.execute_script(SET_INPUT_JS, to_input,
+                              until.strftime('%Y-%m-%d'), until.strftime('%m/%d/%Y'))
+        apply_button = find_first_element(driver, APPLY_FILTER_SELECTORS,
+                                          'apply_filter')
+        if apply_button:
+            apply_button.click()
+        _logger.info(
+            f"Report date range set to {since:%m/%d/%Y} - {until:%m/%d/%Y}")
+    else:
+        _logger.warning(
+            "Date range inputs not found, filtering rows by call time only")
+
+    page_size_select = find_first_element(driver, PAGE_SIZE_SELECTORS, 'page_size')
+    if page_size_select:
+        page_size = driver.execute_script(MAX_PAGE_SIZE_JS, page_size_select)
+        _logger.info(f"Report page size set to {page_size}")
+    else:
+        _logger.warning("Page size selector not found, using default")
+
+    wait_for_report_table(driver, budget)
+
+
+def wait_for_table_change(driver, before, budget):
+    try:
+        budget.wait(driver,
+                    lambda d: d.execute_script(FIRST_ROW_TEXT_JS) != before,
+                    "table to change")
+        return True
+    except TimeoutException:
+        return False
+
+
+def goto_next_page(driver, budget):
+    next_button = find_first_element(driver, NEXT_PAGE_SELECTORS, 'next_page')
+    if not next_button:
+        _logger.info("No next page control, last page reached")
+        return None
+
+    disabled = driver.execute_script(NEXT_DISABLED_JS, next_button)
+    if disabled:
+        _logger.info("Next page control disabled, last page reached")
+        return None
+
+    before = driver.execute_script(FIRST_ROW_TEXT_JS)
+    next_button.click()
+    if not wait_for_table_change(driver, before, budget):
+        _logger.warning(
+            "Table did not change after paging, stopping")
+        return False
+    wait_for_report_table(driver, budget)
+    return True
+
+
+def open_state_db(path=None):
+    # Shared with the pipeline's writer thread, one thread at a time, and
+    # with backfill worker processes, hence WAL and a generous busy timeout
+    conn = sqlite3.connect(path or STATE_DB, timeout=30,
+                           check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS outbox (
+            call_id TEXT PRIMARY KEY,
+            call_time TEXT,
+            payload TEXT NOT NULL,
+            content_hash TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            done_at REAL
+        )""")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS outbox_pending "
+        "ON outbox (status, next_attempt_at)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS backend_runs (
+            started_at TEXT NOT NULL,
+            backend TEXT NOT NULL,
+            seconds REAL,
+            records INTEGER,
+            complete INTEGER
+        )""")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS known_calls (
+            call_id TEXT PRIMARY KEY,
+            call_time TEXT NOT NULL,
+            odoo_id INTEGER,
+            content_hash TEXT,
+            payload TEXT
+        )""")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS known_calls_time ON known_calls (call_time)")
+    # Checkpoints were keyed on chunk_start alone before runs could mix
+    # chunk sizes; those tables are rebuilt with the range as the key
+    rekey = [row[1] for row in conn.execute(
+        "PRAGMA table_info(backfill_chunks)") if row[5]] == ['chunk_start']
+    if rekey:
+        conn.execute("ALTER TABLE backfill_chunks RENAME TO backfill_chunks_old")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS backfill_chunks (
+            chunk_start TEXT NOT NULL,
+            chunk_end TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            records INTEGER,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT,
+            PRIMARY KEY (chunk_start, chunk_end)
+        )""")
+    if rekey:
+        conn.execute(
+            "INSERT INTO backfill_chunks SELECT chunk_start, chunk_end, status, "
+            "records, attempts, updated_at FROM backfill_chunks_old")
+        conn.execute("DROP TABLE backfill_chunks_old")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS call_facts (
+            call_id TEXT PRIMARY KEY,
+            day TEXT NOT NULL,
+            extension TEXT NOT NULL,
+            answered INTEGER NOT NULL,
+            talk_hours REAL NOT NULL,
+            ring_hours REAL NOT NULL,
+            cost REAL NOT NULL
+        )""")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS call_facts_bucket ON call_facts (day, extension)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_aggregates (
+            day TEXT NOT NULL,
+            extension TEXT NOT NULL,
+            calls INTEGER NOT NULL,
+            answered INTEGER NOT NULL,
+            missed INTEGER NOT NULL,
+            talk_hours REAL NOT NULL,
+            ring_hours REAL NOT NULL,
+            cost REAL NOT NULL,
+            odoo_id INTEGER,
+            dirty INTEGER NOT NULL DEFAULT 1,
+            version INTEGER NOT NULL DEFAULT 1,
+            PRIMARY KEY (day, extension)
+        )""")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS daily_aggregates_dirty "
+        "ON daily_aggregates (dirty)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS aggregate_closed_days (day TEXT PRIMARY KEY)")
+    # When each call's queued content was read from 3CX, so a replayed
+    # capture cannot roll back something a later run sent
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS call_seen "
+        "(call_id TEXT PRIMARY KEY, seen_at REAL NOT NULL)")
+    # Columns added after the table first shipped
+    add_missing_column(conn, 'outbox', 'content_hash', 'TEXT')
+    add_missing_column(conn, 'known_calls', 'content_hash', 'TEXT')
+    add_missing_column(conn, 'known_calls', 'payload', 'TEXT')
+    conn.commit()
+    return conn
+
+
+def add_missing_column(conn, table, column, declaration):
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+def record_backend_run(conn, backend, seconds, records, complete):
+    conn.execute(
+        "INSERT INTO backend_runs (started_at, backend, seconds, records, complete) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (datetime.now().isoformat(timespec='seconds'), backend, seconds,
+         records, int(complete)))
+    conn.commit()
+
+
+def record_hash(rec):
+    # Identifies a call's content, so a re-scraped call costs nothing unless
+    # 3CX changed something about it
+    return hashlib.sha1(
+        json.dumps(rec, sort_keys=True).encode()).hexdigest()
+
+
+def calls_seen_after(conn, call_ids, seen_at):
+    call_ids = list(call_ids)
+    newer = set()
+    for start in range(0, len(call_ids), 500):
+        chunk = call_ids[start:start + 500]
+        newer.update(row[0] for row in conn.execute(
+            "SELECT call_id FROM call_seen WHERE seen_at > ? AND call_id IN "
+            f"({','.join('?' * len(chunk))})", [seen_at] + chunk))
+    return newer
+
+
+def enqueue_records(conn, records, seen_at=None):
+    # Rows already in the outbox are left as they are unless their content
+    # changed, which queues them again. Rows queued before hashes existed
+    # just get theirs filled in. seen_at is when the records were read from
+    # 3CX if not just now (a replayed capture); calls queued from a later
+    # read are skipped.
+    now = time.time()
+    with metrics.phase('outbox_enqueue'):
+        if seen_at is not None:
+            newer = calls_seen_after(
+                conn, (rec['call_id'] for rec in records), seen_at)
+            if newer:
+                _logger.info(
+                    f"Skipping {len(newer)} calls sent from a later read")
+                metrics.count('records_superseded', len(newer))
+                records = [rec for rec in records
+                           if rec['call_id'] not in newer]
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT INTO outbox (call_id, call_time, payload, content_hash, "
+            "created_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (call_id) DO UPDATE SET "
+            "payload = excluded.payload, content_hash = excluded.content_hash, "
+            "status = CASE WHEN outbox.content_hash IS NULL THEN outbox.status "
+            "ELSE 'pending' END, "
+            "attempts = CASE WHEN outbox.content_hash IS NULL "
+            "THEN outbox.attempts ELSE 0 END, "
+            "next_attempt_at = CASE WHEN outbox.content_hash IS NULL "
+            "THEN outbox.next_attempt_at ELSE 0 END "
+            "WHERE outbox.content_hash IS NOT excluded.content_hash",
+            [(rec['call_id'], rec['call_time'], json.dumps(rec),
+              record_hash(rec), now) for rec in records])
+        queued = conn.total_changes - before
+        conn.executemany(
+            "INSERT INTO call_seen (call_id, seen_at) VALUES (?, ?) "
+            "ON CONFLICT (call_id) DO UPDATE SET "
+            "seen_at = MAX(call_seen.seen_at, excluded.seen_at)",
+            [(rec['call_id'], seen_at or now) for rec in records])
+        update_aggregates(conn, records)
+        conn.commit()
+    metrics.count('outbox_queued', queued)
+
+
+def outbox_backoff(attempts):
+    return min(OUTBOX_BACKOFF_MAX_SECONDS,
+               OUTBOX_BACKOFF_SECONDS * 2 ** max(0, attempts - 1))
+
+
+def drain_outbox(conn, odoo=None, batch_size=None, max_wait=None):
+    # Pushes pending outbox rows in batches. Rows Odoo did not acknowledge are
+    # rescheduled with exponential backoff; waits longer than max_wait are
+    # left for a later drain. A batch where nothing lands ends the drain, so
+    # an Odoo outage costs one attempt rather than a loop over the backlog.
+    batch_size = batch_size or ODOO_BATCH_SIZE
+    max_wait = OUTBOX_MAX_WAIT_SECONDS if max_wait is None else max_wait
+    wait_until = time.monotonic() + max_wait
+    done_count = 0
+    failed_count = 0
+    # Rows rescheduled during a pass are due after this, so no pass picks
+    # the same row twice
+    pass_started = time.time()
+
+    while True:
+        rows = conn.execute(
+            "SELECT call_id, payload, attempts FROM outbox "
+            "WHERE status = 'pending' AND next_attempt_at <= ? "
+            "ORDER BY call_time LIMIT ?", (pass_started, batch_size)).fetchall()
+        if not rows:
+            next_attempt = conn.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox "
+                "WHERE status = 'pending'").fetchone()[0]
+            if next_attempt is None:
+                break
+            delay = max(0.0, next_attempt - time.time())
+            if time.monotonic() + delay > wait_until:
+                break
+            _logger.info(f"Outbox retry backoff, sleeping {delay:.1f}s")
+            time.sleep(delay)
+            pass_started = time.time()
+            continue
+
+        confirmed_ids = set()
+        error = "not acknowledged by Odoo"
+        try:
+            odoo = odoo or connect_odoo()
+            reconcile_known_calls(conn, odoo)
+            confirmed_ids = set(push_to_odoo(
+                [json.loads(payload) for _, payload, _ in rows],
+                batch_size=batch_size, odoo=odoo, state=conn))
+        except Exception as e:
+            error = str(e)
+            _logger.error(f"Error connecting to Odoo: {e}")
+        if not confirmed_ids:
+            # Nothing landed, so the connection itself is suspect
+            odoo = None
+
+        now = time.time()
+        conn.executemany(
+            "UPDATE outbox SET status = 'done', done_at = ?, last_error = NULL "
+            "WHERE call_id = ?",
+            [(now, call_id) for call_id, _, _ in rows if call_id in confirmed_ids])
+        conn.executemany(
+            "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? "
+            "WHERE call_id = ?",
+            [(attempts + 1, now + outbox_backoff(attempts + 1), error, call_id)
+             for call_id, _, attempts in rows if call_id not in confirmed_ids])
+        conn.commit()
+        done_count += len(confirmed_ids)
+        failed_count += len(rows) - len(confirmed_ids)
+        metrics.count('outbox_acknowledged', len(confirmed_ids))
+        metrics.count('outbox_retries_scheduled', len(rows) - len(confirmed_ids))
+        if not confirmed_ids:
+            _logger.warning("Odoo acknowledged nothing, leaving the rest of "
+                            "the outbox for a later drain")
+            break
+
+    conn.execute(
+        "DELETE FROM outbox WHERE status = 'done' AND done_at < ?",
+        (time.time() - OUTBOX_RETENTION_DAYS * 86400,))
+    if CAPTURE_RETENTION_DAYS:
+        # Nothing older is left to replay
+        conn.execute("DELETE FROM call_seen WHERE seen_at < ?",
+                     (time.time() - CAPTURE_RETENTION_DAYS * 86400,))
+    conn.commit()
+    evict_known_calls(conn)
+    if ODOO_AGGREGATE_MODEL:
+        try:
+            if conn.execute(
+                    "SELECT 1 FROM daily_aggregates WHERE dirty = 1").fetchone():
+                odoo = odoo or connect_odoo()
+                push_aggregates(conn, odoo)
+        except Exception as e:
+            _logger.error(f"Error pushing daily aggregates: {e}")
+    evict_call_facts(conn)
+    pending = conn.execute(
+        "SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+    _logger.info(
+        f"Outbox drained: {done_count} acknowledged, {failed_count} failed "
+        f"attempts, {pending} still pending")
+    return {'done': done_count, 'failed': failed_count, 'pending': pending,
+            'odoo': odoo}
+
+
+def outbox_done_ids(conn, call_ids):
+    call_ids = list(call_ids)
+    done = set()
+    # Stay under SQLite's bound-parameter limit
+    for start in range(0, len(call_ids), 500):
+        chunk = call_ids[start:start + 500]
+        done.update(row[0] for row in conn.execute(
+            "SELECT call_id FROM outbox WHERE status = 'done' AND call_id IN "
+            f"({','.join('?' * len(chunk))})", chunk))
+    return done
+
+
+def load_known_calls(conn, call_ids):
+    # {call_id: (content_hash, odoo_id, record as last sent)} for the
+    # call_ids in the index
+    call_ids = list(call_ids)
+    known = {}
+    for start in range(0, len(call_ids), 500):
+        chunk = call_ids[start:start + 500]
+        for call_id, content_hash, odoo_id, payload in conn.execute(
+                "SELECT call_id, content_hash, odoo_id, payload FROM known_calls "
+                f"WHERE call_id IN ({','.join('?' * len(chunk))})", chunk):
+            known[call_id] = (content_hash, odoo_id,
+                              json.loads(payload) if payload else None)
+    return known
+
+
+def remember_known_calls(conn, pairs):
+    # pairs are (odoo_id, rec) as Odoo now holds them, odoo_id possibly None
+    conn.executemany(
+        "INSERT INTO known_calls (call_id, call_time, odoo_id, content_hash, "
+        "payload) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT (call_id) DO UPDATE SET call_time = excluded.call_time, "
+        "odoo_id = COALESCE(excluded.odoo_id, known_calls.odoo_id), "
+        "content_hash = excluded.content_hash, payload = excluded.payload",
+        [(rec['call_id'], rec['call_time'], odoo_id, record_hash(rec),
+          json.dumps(rec)) for odoo_id, rec in pairs])
+    conn.commit()
+
+
+def known_calls_eviction_cutoff():
+    return (datetime.now() - timedelta(hours=KNOWN_CALLS_RETENTION_HOURS)
+            ).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def evict_known_calls(conn):
+    conn.execute("DELETE FROM known_calls WHERE call_time < ?",
+                 (known_calls_eviction_cutoff(),))
+    conn.commit()
+
+
+def reconcile_known_calls(conn, odoo, force=False):
+    # Rebuilds the index from logs.3cx with one search_read over the retention
+    # window, so records deleted or created elsewhere stop drifting from it
+    row = conn.execute(
+        "SELECT value FROM state WHERE key = 'known_calls_reconciled_at'"
+    ).fetchone()
+    if not force and row and \
+            time.time() - float(row[0]) < KNOWN_CALLS_RECONCILE_HOURS * 3600:
+        return False
+
+    cutoff = known_calls_eviction_cutoff()
+    with metrics.phase('odoo_reconcile'):
+        records = odoo.env['logs.3cx'].search_read(
+            [('call_time', '>=', cutoff)], ['call_id', 'call_time'])
+    metrics.count('odoo_rpcs')
+    # What we sent for calls still in Odoo stays valid, the rest is dropped
+    sent = {row[0]: row[1:] for row in conn.execute(
+        "SELECT call_id, content_hash, payload FROM known_calls")}
+    conn.execute("DELETE FROM known_calls")
+    conn.executemany(
+        "INSERT OR REPLACE INTO known_calls (call_id, call_time, odoo_id, "
+        "content_hash, payload) VALUES (?, ?, ?, ?, ?)",
+        [(rec['call_id'], rec['call_time'], rec['id'])
+         + tuple(sent.get(rec['call_id'], (None, None)))
+         for rec in records if rec.get('call_id')])
+    conn.execute(
+        "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+        ('known_calls_reconciled_at', str(time.time())))
+    conn.commit()
+    _logger.info(
+        f"Re-synced known call index: {len(records)} calls since {cutoff}")
+    return True
+
+
+# "Jane Doe (101)" as the report shows parties, or a bare extension number
+EXTENSION_RE = re.compile(r'\((\d+)\)|^(\d{2,6})$')
+COST_RE = re.compile(r'-?\d[\d.,]*')
+
+
+def call_extension(rec):
+    # The local party of a call: the caller, unless it came in from outside
+    party = rec.get('call_to') if rec.get('call_type') == 'inbound' \
+        else rec.get('call_from')
+    match = EXTENSION_RE.search((party or '').strip())
+    return (match.group(1) or match.group(2)) if match else None
+
+
+def parse_cost(value):
+    # "$1.25", "1,25 €", "0.0300" -> float; whichever separator comes last is
+    # the decimal one
+    match = COST_RE.search(str(value or ''))
+    if not match:
+        return 0.0
+    number = match.group().rstrip('.,')
+    if ',' in number and '.' in number:
+        if number.rfind(',') > number.rfind('.'):
+            number = number.replace('.', '').replace(',', '.')
+        else:
+            number = number.replace(',', '')
+    else:
+        number = number.replace(',', '.')
+    try:
+        return float(number)
+    except ValueError:
+        return 0.0
+
+
+def update_aggregates(conn, records):
+    # Keeps one fact row per call and recomputes only the (day, extension)
+    # buckets a new or changed call falls into, or moved out of. Buckets whose
+    # totals changed are marked dirty for push_aggregates. Leaves the commit
+    # to the caller.
+    facts = {}
+    for rec in records:
+        extension = call_extension(rec)
+        if extension and rec.get('call_time'):
+            facts[rec['call_id']] = (
+                rec['call_time'][:10], extension,
+                int(rec.get('call_status') == 'answered'),
+                float(rec.get('call_talking_time') or 0.0),
+                float(rec.get('call_ringing_time') or 0.0),
+                parse_cost(rec.get('call_cost')))
+    if not facts:
+        return 0
+
+    days = list({fact[0] for fact in facts.values()})
+    closed = {row[0] for row in conn.execute(
+        f"SELECT day FROM aggregate_closed_days WHERE day IN "
+        f"({','.join('?' * len(days))})", days)}
+    call_ids = [call_id for call_id, fact in facts.items()
+                if fact[0] not in closed]
+    old = {}
+    for start in range(0, len(call_ids), 500):
+        chunk = call_ids[start:start + 500]
+        old.update((row[0], tuple(row[1:])) for row in conn.execute(
+            f"SELECT call_id, day, extension, answered, talk_hours, ring_hours, "
+            f"cost FROM call_facts WHERE call_id IN ({','.join('?' * len(chunk))})",
+            chunk))
+    changed = [call_id for call_id in call_ids
+               if old.get(call_id) != facts[call_id]]
+    if not changed:
+        return 0
+
+    conn.executemany(
+        "INSERT OR REPLACE INTO call_facts (call_id, day, extension, answered, "
+        "talk_hours, ring_hours, cost) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(call_id,) + facts[call_id] for call_id in changed])
+    buckets = {facts[call_id][:2] for call_id in changed}
+    buckets.update(old[call_id][:2] for call_id in changed if call_id in old)
+
+    before = conn.total_changes
+    for day, extension in buckets:
+        calls, answered, talk, ring, cost = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(answered), 0), "
+            "COALESCE(SUM(talk_hours), 0), COALESCE(SUM(ring_hours), 0), "
+            "COALESCE(SUM(cost), 0) FROM call_facts "
+            "WHERE day = ? AND extension = ?", (day, extension)).fetchone()
+        conn.execute(
+            "INSERT INTO daily_aggregates (day, extension, calls, answered, "
+            "missed, talk_hours, ring_hours, cost) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (day, extension) DO UPDATE SET "
+            "calls = excluded.calls, answered = excluded.answered, "
+            "missed = excluded.missed, talk_hours = excluded.talk_hours, "
+            "ring_hours = excluded.ring_hours, cost = excluded.cost, "
+            "dirty = 1, version = daily_aggregates.version + 1 "
+            "WHERE (calls, answered, missed, talk_hours, ring_hours, cost) <> "
+            "(excluded.calls, excluded.answered, excluded.missed, "
+            "excluded.talk_hours, excluded.ring_hours, excluded.cost)",
+            (day, extension, calls, answered, calls - answered,
+             round(talk, 4), round(ring, 4), round(cost, 4)))
+    updated = conn.total_changes - before
+    metrics.count('aggregate_buckets_changed', updated)
+    return updated
+
+
+def aggregate_values(day, extension, calls, answered, missed, talk, ring, cost):
+    return {'date': day, 'extension': extension, 'call_count': calls,
+            'answered_count': answered, 'missed_count': missed,
+            'talking_time': talk, 'ringing_time': ring, 'call_cost': cost}
+
+
+def push_aggregates(conn, odoo, model=None):
+    # Upserts the dirty buckets into the aggregate model: writes where the
+    # Odoo id is known or found, one batched create for the rest. A bucket
+    # that changed again meanwhile stays dirty for the next push.
+    model = model or ODOO_AGGREGATE_MODEL
+    rows = conn.execute(
+        "SELECT day, extension, calls, answered, missed, talk_hours, "
+        "ring_hours, cost, odoo_id, version FROM daily_aggregates "
+        "WHERE dirty = 1").fetchall()
+    if not model or not rows:
+        return 0
+
+    with metrics.phase('odoo_aggregates'):
+        odoo_ids = {(row[0], row[1]): row[8] for row in rows}
+        unknown = [key for key, odoo_id in odoo_ids.items() if not odoo_id]
+        if unknown:
+            # The local store may be newer than the rows Odoo already has
+            existing = odoo.env[model].search_read(
+                [('date', 'in', sorted({day for day, _ in unknown})),
+                 ('extension', 'in', sorted({ext for _, ext in unknown}))],
+                ['date', 'extension'])
+            metrics.count('odoo_rpcs')
+            for rec in existing:
+                key = (rec['date'], rec['extension'])
+                if key in odoo_ids and not odoo_ids[key]:
+                    odoo_ids[key] = rec['id']
+
+        updates = [row for row in rows if odoo_ids[(row[0], row[1])]]
+        creates = [row for row in rows if not odoo_ids[(row[0], row[1])]]
+        create_chunks = [creates[start:start + ODOO_BATCH_SIZE]
+                         for start in range(0, len(creates), ODOO_BATCH_SIZE)]
+        results = odoo.execute_many(
+            [(model, 'write', [[odoo_ids[(row[0], row[1])]],
+                               aggregate_values(*row[:8])], {})
+             for row in updates]
+            + [(model, 'create', [[aggregate_values(*row[:8]) for row in chunk]], {})
+               for chunk in create_chunks])
+        metrics.count('odoo_rpcs', len(results))
+
+    pushed = []
+    for row, result in zip(updates, results):
+        if isinstance(result, Exception):
+            _logger.error(f"Error updating aggregate {row[0]} {row[1]}: {result}")
+        else:
+            pushed.append((odoo_ids[(row[0], row[1])], row))
+    for chunk, result in zip(create_chunks, results[len(updates):]):
+        if isinstance(result, Exception):
+            _logger.error(f"Error creating {len(chunk)} aggregates: {result}")
+        else:
+            pushed.extend(zip(result, chunk))
+    conn.executemany(
+        "UPDATE daily_aggregates SET odoo_id = ?, "
+        "dirty = CASE WHEN version = ? THEN 0 ELSE dirty END "
+        "WHERE day = ? AND extension = ?",
+        [(odoo_id, row[9], row[0], row[1]) for odoo_id, row in pushed])
+    conn.commit()
+    metrics.count('aggregates_pushed', len(pushed))
+    _logger.info(
+        f"Pushed {len(pushed)} of {len(rows)} changed daily aggregates to {model}")
+    return len(pushed)
+
+
+# Days a backfill chunk still has to fill (pending, running or failed)
+BACKFILL_OPEN_DAY = (
+    "EXISTS (SELECT 1 FROM backfill_chunks WHERE status != 'done' "
+    "AND chunk_start < datetime(call_facts.day, '+1 day') "
+    "AND chunk_end > datetime(call_facts.day))")
+
 
-    # Setup headless Chrome with better options
+def evict_call_facts(conn):
+    # Days past the retention lose their per-call facts and become final:
+    # calls for them that show up later no longer move their totals. Days a
+    # backfill has not finished stay open until it has.
+    cutoff = (datetime.now() - timedelta(days=AGGREGATE_RETENTION_DAYS)
+              ).strftime('%Y-%m-%d')
+    conn.execute(
+        "INSERT OR IGNORE INTO aggregate_closed_days (day) "
+        "SELECT DISTINCT day FROM call_facts "
+        f"WHERE day < ? AND NOT {BACKFILL_OPEN_DAY}", (cutoff,))
+    conn.execute(
+        f"DELETE FROM call_facts WHERE day < ? AND NOT {BACKFILL_OPEN_DAY}",
+        (cutoff,))
+    conn.commit()
+
+
+def load_high_water_mark(conn):
+    row = conn.execute(
+        "SELECT value FROM state WHERE key = 'high_water_mark'").fetchone()
+    if not row:
+        return None, set()
+    mark = json.loads(row[0])
+    return mark['call_time'], set(mark['call_ids'])
+
+
+def advance_high_water_mark(conn, confirmed, failed=()):
+    # confirmed/failed are (call_time, call_id) pairs. The mark never moves
+    # past a failed row, otherwise the next run would stop paging before it.
+    if failed:
+        oldest_failure = min(call_time for call_time, _ in failed)
+        confirmed = [(t, i) for t, i in confirmed if t < oldest_failure]
+    if not confirmed:
+        return False
+
+    newest = max(call_time for call_time, _ in confirmed)
+    call_ids = {i for t, i in confirmed if t == newest}
+    mark_time, mark_ids = load_high_water_mark(conn)
+    if mark_time and newest < mark_time:
+        return False
+    if newest == mark_time:
+        call_ids |= mark_ids
+
+    conn.execute(
+        "INSERT OR REPLACE INTO state (key, value) VALUES ('high_water_mark', ?)",
+        (json.dumps({'call_time': newest, 'call_ids': sorted(call_ids)}),))
+    conn.commit()
+    _logger.info(f"High-water mark advanced to {newest}")
+    return True
+
+
+def login_3cx(driver, login_url, budget):
+    # Navigate to login page
+    _logger.info(f"Navigating to login URL: {login_url}")
+    driver.get(login_url)
+    _logger.info(f"Current URL after navigation: {driver.current_url}")
+
+    try:
+        try:
+            # Login form is interactive once any username input is usable;
+            # every candidate is probed on each poll
+            login_element = budget.wait(
+                driver, first_element_ready(LOGIN_USER_SELECTORS, 'login_user'),
+                "login form")
+        except TimeoutException:
+            _logger.error("Could not find login input element")
+            _logger.info(f"Page source: {driver.page_source[:1000]}...")
+            return False
+
+        # Clear and enter username
+        login_element.clear()
+        login_element.send_keys(THREECX_USER)
+        _logger.info("Username entered")
+
+        # The rest of the form rendered with the username input
+        password_element = find_first_element(
+            driver, LOGIN_PASSWORD_SELECTORS, 'login_password')
+        if not password_element:
+            _logger.error("Could not find password input element")
+            return False
+
+        password_element.clear()
+        password_element.send_keys(THREECX_PASS)
+        _logger.info("Password entered")
+
+        submit_button = find_first_element(
+            driver, LOGIN_SUBMIT_SELECTORS, 'login_submit')
+        if not submit_button:
+            _logger.error("Could not find submit button")
+            return False
+
+        submit_button.click()
+        _logger.info("Submit button clicked")
+
+        # Wait for login to complete
+        budget.wait(driver, left_login_route, "post-login route")
+        _logger.info(f"Current URL after login: {driver.current_url}")
+        return True
+
+    except TimeoutException as e:
+        _logger.error(f"Timeout waiting for login elements: {e}")
+        _logger.info(f"Page source: {driver.page_source}")
+        return False
+
+
+# Snapshot and restore of the SPA's localStorage (auth tokens live there)
+DUMP_LOCAL_STORAGE_JS = "return Object.assign({}, window.localStorage);"
+RESTORE_LOCAL_STORAGE_JS = """
+var items = arguments[0];
+Object.keys(items).forEach(function (key) { localStorage.setItem(key, items[key]); });
+"""
+
+
+def save_session(scraper):
+    # Cookies are stored in Selenium's format whichever backend saved them
+    if not THREECX_SESSION_KEY:
+        return
+    try:
+        cookies, local_storage = scraper.session_state()
+        payload = {
+            'url': THREECX_URL,
+            'saved_at': datetime.now().isoformat(),
+            'cookies': cookies,
+            'local_storage': local_storage,
+        }
+        token = Fernet(THREECX_SESSION_KEY).encrypt(json.dumps(payload).encode())
+        fd = os.open(THREECX_SESSION_FILE,
+                     os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(token)
+        _logger.info(f"Saved 3CX session to {THREECX_SESSION_FILE}")
+    except Exception as e:
+        _logger.warning(f"Could not save 3CX session: {e}")
+
+
+def load_session():
+    if not THREECX_SESSION_KEY or not os.path.exists(THREECX_SESSION_FILE):
+        return None
+    try:
+        with open(THREECX_SESSION_FILE, 'rb') as f:
+            payload = json.loads(Fernet(THREECX_SESSION_KEY).decrypt(f.read()))
+    except (InvalidToken, ValueError, OSError) as e:
+        _logger.warning(f"Ignoring unreadable 3CX session file: {e}")
+        return None
+    if payload.get('url') != THREECX_URL:
+        _logger.info("Saved 3CX session belongs to another instance, ignoring")
+        return None
+    return payload
+
+
+def wait_for_landing(driver, budget):
+    # The SPA either shows the report or bounces an unauthenticated visit
+    try:
+        return budget.wait(
+            driver,
+            lambda d: ('login' if '/#/login' in d.current_url else
+                       'report' if d.find_elements(By.CSS_SELECTOR, 'table')
+                       else False),
+            "report or login redirect")
+    except TimeoutException:
+        return 'timeout'
+
+
+COOKIE_FIELDS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly')
+
+
+def playwright_cookie(cookie):
+    converted = {key: cookie[key] for key in COOKIE_FIELDS if key in cookie}
+    converted.setdefault('path', '/')
+    if cookie.get('expiry'):
+        converted['expires'] = cookie['expiry']
+    if cookie.get('sameSite') in ('Strict', 'Lax', 'None'):
+        converted['sameSite'] = cookie['sameSite']
+    return converted
+
+
+def selenium_cookie(cookie):
+    converted = {key: cookie[key] for key in COOKIE_FIELDS if key in cookie}
+    if cookie.get('expires', -1) > 0:
+        converted['expiry'] = int(cookie['expires'])
+    if cookie.get('sameSite') in ('Strict', 'Lax', 'None'):
+        converted['sameSite'] = cookie['sameSite']
+    return converted
+
+
+# URL patterns (CDP wildcards) the lean profile never fetches: images and
+# avatars, web fonts, audio, and analytics beacons
+LEAN_BLOCKED_URLS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.ico', '*.svg',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp3', '*.wav', '*.ogg', '*.mp4',
+    '*/avatar*', '*gravatar.com*', '*google-analytics.com*',
+    '*googletagmanager.com*', '*doubleclick.net*', '*hotjar.com*',
+    '*sentry.io*', '*fonts.googleapis.com*', '*fonts.gstatic.com*',
+]
+# Playwright can intercept by resource type instead
+LEAN_BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media', 'manifest'}
+
+
+def lean_browser_args():
+    # The disk cache keeps the SPA bundle warm between runs. Chrome cannot
+    # share one cache directory between processes, so a browser that finds it
+    # locked (parallel backfill or tenant workers) runs without it. Returns
+    # (args, lock file to hold open while the browser runs).
+    args = [
+        f'--js-flags=--max-old-space-size={BROWSER_RENDERER_HEAP_MB}',
+        '--renderer-process-limit=2',
+        '--disable-background-networking',
+        '--disable-component-update',
+        '--disable-default-apps',
+        '--disable-sync',
+        '--mute-audio',
+        '--no-first-run',
+        '--blink-settings=imagesEnabled=false',
+    ]
+    cache_lock = None
+    try:
+        os.makedirs(BROWSER_CACHE_DIR, exist_ok=True)
+        cache_lock = open(os.path.join(BROWSER_CACHE_DIR, '.lock'), 'w')
+        fcntl.flock(cache_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        args += [f'--disk-cache-dir={os.path.abspath(BROWSER_CACHE_DIR)}',
+                 f'--disk-cache-size={BROWSER_CACHE_MB * 1024 * 1024}']
+    except OSError:
+        _logger.info("Browser cache in use by another browser, running without it")
+        if cache_lock:
+            cache_lock.close()
+        cache_lock = None
+    return args, cache_lock
+
+
+def create_driver():
+    # Setup headless Chrome with better options. Returns (driver, cache lock).
     opts = Options()
     opts.binary_location = os.getenv("CHROME_BIN", "/usr/bin/chromium-browser")
     opts.add_argument('--headless')
@@ -57,306 +1625,2240 @@ def scrape_3cx():
     opts.add_argument('--disable-gpu')
     opts.add_argument('--disable-extensions')
     opts.add_argument('--disable-plugins')
-    opts.add_argument('--disable-images')
-    opts.add_argument('--disable-javascript')  # Remove if site needs JS
     opts.add_argument('--window-size=1920,1080')
     opts.add_argument(
         '--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+    # Network events carry the bytes each response took on the wire
+    opts.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    cache_lock = None
+    if THREECX_BROWSER_PROFILE == 'lean':
+        args, cache_lock = lean_browser_args()
+        for arg in args:
+            opts.add_argument(arg)
+
+    chrome_service = Service(executable_path=os.getenv(
+        "CHROMEDRIVER_PATH", "/usr/bin/chromedriver"))
+
+    try:
+        driver = webdriver.Chrome(service=chrome_service, options=opts)
+    except Exception:
+        if cache_lock:
+            cache_lock.close()
+        raise
+    driver.execute_cdp_cmd('Network.enable', {})
+    if THREECX_BROWSER_PROFILE == 'lean':
+        driver.execute_cdp_cmd('Network.setBlockedURLs',
+                               {'urls': LEAN_BLOCKED_URLS})
+    _logger.info(
+        f"Chrome driver initialized successfully ({THREECX_BROWSER_PROFILE} profile)")
+    return driver, cache_lock
+
+
+def network_log_bytes(driver):
+    # Drains chromedriver's performance log: (bytes received, requests blocked)
+    received = blocked = 0
+    for entry in driver.get_log('performance'):
+        message = json.loads(entry['message'])['message']
+        if message['method'] == 'Network.loadingFinished':
+            received += message['params'].get('encodedDataLength', 0)
+        elif message['method'] == 'Network.loadingFailed' and \
+                message['params'].get('blockedReason'):
+            blocked += 1
+    return received, blocked
+
+
+def check_3cx_env():
+    # Add environment variables check
+    _logger.info("Checking environment variables...")
+    required_vars = ['THREECX_URL', 'THREECX_USER', 'THREECX_PASS']
+    for var in required_vars:
+        if not os.getenv(var):
+            _logger.error(f"Missing required environment variable: {var}")
+            return False
+        else:
+            _logger.info(f"{var} is set")
+    return True
+
+
+def select_window_rows(raw_rows, since_str, until_str, seen_ids,
+                       newest_first=True):
+    # Parses raw cell arrays and keeps the new rows inside the window.
+    # Returns (records, reached_window_start).
+    page_rows = []
+    reached_window_start = False
+    parsed = failed = skipped = 0
+    with metrics.phase('parse'):
+        for record in normalize_rows(raw_rows):
+            if not record:
+                failed += 1
+                continue
+            parsed += 1
+            if record['call_time'] < since_str:
+                # The report is sorted newest first, so the first row before
+                # the window means every later row and page is older still
+                if newest_first:
+                    reached_window_start = True
+                    break
+                skipped += 1
+                continue
+            # Rows sharing the mark's timestamp may or may not have been
+            # pushed yet, so only skip the ones we know about
+            if record['call_id'] in seen_ids:
+                _logger.debug(
+                    f"Call ID {record['call_id']} already pushed, skipping")
+                skipped += 1
+                continue
+            if record['call_time'] <= until_str:
+                page_rows.append(record)
+            else:
+                skipped += 1
+    metrics.count('rows_seen', len(raw_rows))
+    metrics.count('rows_parsed', parsed)
+    metrics.count('rows_failed', failed)
+    metrics.count('rows_skipped', skipped)
+    metrics.count('rows_selected', len(page_rows))
+    return page_rows, reached_window_start
+
+
+def download_report_csv(driver, budget):
+    # Clicks the report's CSV export into a fresh temp directory and returns
+    # the finished file's path, or None when the export is not available
+    export_button = find_first_element(driver, EXPORT_SELECTORS, 'export')
+    if not export_button:
+        _logger.warning("Export control not found")
+        return None
+
+    download_dir = tempfile.mkdtemp(prefix="3cx-export-")
+    driver.execute_cdp_cmd('Browser.setDownloadBehavior', {
+        'behavior': 'allow', 'downloadPath': download_dir})
+    export_button.click()
+    # Some versions open a format menu first
+    csv_item = find_first_element(driver, EXPORT_CSV_SELECTORS, 'export_csv')
+    if csv_item:
+        csv_item.click()
+
+    sizes = {}
+
+    def finished_file(_):
+        names = os.listdir(download_dir)
+        if not names or any(n.endswith(('.crdownload', '.tmp')) for n in names):
+            return False
+        path = os.path.join(download_dir, names[0])
+        size = os.path.getsize(path)
+        # Done once the size has held still for one poll
+        stable = size > 0 and sizes.get(path) == size
+        sizes[path] = size
+        return path if stable else False
+
+    try:
+        return budget.wait(driver, finished_file, "CSV export download",
+                           timeout=EXPORT_TIMEOUT_SECONDS)
+    except TimeoutException:
+        shutil.rmtree(download_dir, ignore_errors=True)
+        return None
+
+
+def iter_csv_raw_pages(path, page_size=None):
+    # Streams the export file in pages of (header, raw cell arrays) without
+    # loading it
+    page_size = page_size or ODOO_BATCH_SIZE
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        _logger.info(f"CSV export columns: {header}")
+        while True:
+            raw_rows = list(itertools.islice(reader, page_size))
+            if not raw_rows:
+                break
+            yield header, raw_rows
+
+
+def iso_duration_to_hms(value):
+    # 3CX's API reports durations as ISO 8601 ("PT1M5.25S"); the table path
+    # works on "H:MM:SS", so convert to that and reuse the same rounding
+    if not value:
+        return ""
+    match = ISO_DURATION_RE.match(value)
+    if not match:
+        return value
+    days, hours, minutes, seconds = (float(g or 0) for g in match.groups())
+    total = int(days * 86400 + hours * 3600 + minutes * 60 + math.ceil(seconds))
+    return f"{total // 3600}:{total % 3600 // 60:02d}:{total % 60:02d}"
+
+
+class ThreeCXClient:
+    # Talks to the JSON endpoints the 3CX web client itself uses, over one
+    # pooled keep-alive session, so no browser is needed
+    def __init__(self, base_url=None, user=None, password=None, session=None):
+        self.base_url = (base_url or THREECX_URL).rstrip('/')
+        self.user = user or THREECX_USER
+        self.password = password or THREECX_PASS
+        self.session = session or requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=2, pool_maxsize=4,
+            max_retries=urllib3.util.Retry(
+                total=3, backoff_factor=0.5, allowed_methods=None,
+                status_forcelist=(502, 503, 504)))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.request_count = 0
+        self.bytes_received = 0
+
+    def received(self, response):
+        # Body size as sent, before requests undoes any gzip
+        self.request_count += 1
+        self.bytes_received += int(response.headers.get(
+            'Content-Length') or len(response.content))
+
+    def login(self):
+        response = self.session.post(
+            self.base_url + THREECX_API_LOGIN_PATH,
+            json={'Username': self.user, 'Password': self.password,
+                  'SecurityCode': ''},
+            timeout=THREECX_API_TIMEOUT)
+        self.received(response)
+        response.raise_for_status()
+        body = response.json()
+        if body.get('Status') != 'AuthSuccess':
+            raise RuntimeError(f"3CX login failed: {body.get('Status')}")
+        self.session.headers['Authorization'] = \
+            f"Bearer {body['Token']['access_token']}"
+        _logger.info("Logged in to the 3CX API")
+
+    def get_json(self, path, params=None):
+        if 'Authorization' not in self.session.headers:
+            self.login()
+        url = self.base_url + path
+        response = self.session.get(url, params=params,
+                                    timeout=THREECX_API_TIMEOUT)
+        self.received(response)
+        if response.status_code == 401:
+            # Access tokens are short lived, log in again once
+            self.login()
+            response = self.session.get(url, params=params,
+                                        timeout=THREECX_API_TIMEOUT)
+            self.received(response)
+        response.raise_for_status()
+        return response.json()
+
+    def iter_call_log(self, since, until, page_size=None):
+        # Yields one list of raw call-log entries per API page, newest first
+        page_size = page_size or THREECX_API_PAGE_SIZE
+        path = THREECX_API_CALL_LOG_PATH.format(
+            since=since.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            until=until.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'))
+        skip = 0
+        while True:
+            body = self.get_json(path, {
+                '$top': page_size, '$skip': skip,
+                '$orderby': 'StartTime desc'})
+            entries = body.get('value', [])
+            yield entries
+            if len(entries) < page_size:
+                break
+            skip += page_size
+
+    def close(self):
+        self.session.close()
+
+
+def api_entry_to_cells(entry):
+    # Lays an API call-log entry out like a report table row so
+    # normalize_rows handles it exactly like scraped rows
+    call_id = entry.get(THREECX_API_CALL_ID_FIELD)
+    start = entry.get('StartTime')
+    if not call_id or not start:
+        return []
+
+    # API times are UTC, the report shows (and we store) local time
+    call_time = datetime.fromisoformat(start.replace('Z', '+00:00'))
+    call_time = call_time.astimezone().replace(tzinfo=None)
+
+    if entry.get('SrcInternal') and not entry.get('DstInternal'):
+        call_type = 'outbound'
+    elif entry.get('DstInternal') and not entry.get('SrcInternal'):
+        call_type = 'inbound'
+    else:
+        call_type = 'internal'
+
+    return [
+        call_time.strftime('%m/%d/%Y %I:%M:%S %p'),
+        str(call_id),
+        entry.get('SourceDn') or entry.get('SourceCallerId') or '',
+        entry.get('DestinationCallerId') or entry.get('DestinationDn') or '',
+        call_type,
+        'answered' if entry.get('Answered') else 'unanswered',
+        '',
+        iso_duration_to_hms(entry.get('RingingDuration')),
+        iso_duration_to_hms(entry.get('TalkingDuration')),
+        str(entry.get('CallCost') or ''),
+        entry.get('Reason') or entry.get('ActionType') or '',
+    ]
+
+
+class ScraperBackend:
+    # One way of reading the call report. Backends only log in, open the
+    # report and yield pages of raw cell arrays in the report's column order;
+    # normalize_rows handles them the same way whatever the source.
+    name = None
+    # Turned off when pages are not sorted newest first, which disables the
+    # early stop at the window start
+    rows_sorted = True
+    # Which of the backend-specific settings this backend acts on
+    options = ()
+    logged_in = False
+    on_report = False
+
+    @classmethod
+    def ignored_options(cls):
+        # Backend-specific settings changed from their default that this
+        # backend would not act on, as "NAME=value"
+        changed = {'THREECX_INGEST_MODE': THREECX_INGEST_MODE != 'table',
+                   'THREECX_EXTRACT_MODE': THREECX_EXTRACT_MODE != 'script'}
+        return [f"{name}={globals()[name]}" for name, is_set in changed.items()
+                if is_set and name not in cls.options]
+
+    def start(self):
+        pass
+
+    def login(self, budget):
+        # A warm browser only reloads the report, then a saved session is
+        # tried; the login form comes last since every form login counts
+        # toward 3CX's lockout
+        self.on_report = False
+        if self.logged_in:
+            if self.reload_report(budget):
+                self.on_report = True
+                return True
+            _logger.info("3CX session expired, logging in again")
+            self.logged_in = False
+
+        # A restored session lands straight on the report
+        session = load_session()
+        if session:
+            if self.resume_session(session, budget):
+                _logger.info(f"Reused 3CX session saved at {session['saved_at']}")
+                self.logged_in = self.on_report = True
+                return True
+            _logger.info("Saved 3CX session rejected, logging in again")
+        if not self.form_login(budget):
+            return False
+        save_session(self)
+        self.logged_in = True
+        return True
+
+    def reload_report(self, budget):
+        # True when the report loads without logging in again
+        return False
+
+    def resume_session(self, session, budget):
+        return False
+
+    def form_login(self, budget):
+        raise NotImplementedError
+
+    def session_state(self):
+        # (cookies in Selenium's format, localStorage items)
+        raise NotImplementedError
+
+    def open_report(self, budget):
+        raise NotImplementedError
+
+    def iter_raw_pages(self, since, until, budget, result):
+        # Yields (header, rows) per page with the cells as the report shows
+        # them; the header is empty when rows are already in parse order
+        raise NotImplementedError
+
+    def alive(self):
+        return True
+
+    def rss_mb(self):
+        return 0.0
+
+    def network_usage(self):
+        # (bytes received, requests blocked) since the last call
+        return 0, 0
+
+    def debug_state(self):
+        return ""
+
+    def switch_tenant(self):
+        # Forgets everything tied to the previous 3CX instance so the same
+        # browser can serve the next one. False means it cannot be reused.
+        return False
+
+    def close(self):
+        pass
+
+
+class SeleniumBackend(ScraperBackend):
+    name = 'selenium'
+    options = ('THREECX_INGEST_MODE', 'THREECX_EXTRACT_MODE')
+
+    def __init__(self):
+        self.driver = None
+        self.cache_lock = None
+        self.logged_in = False
+        self.on_report = False
+        self.set_urls()
+
+    def set_urls(self):
+        self.origin = THREECX_URL.rstrip('/')
+        self.login_url = self.origin + "/#/login"
+        self.report_url = self.origin + "/#/office/reports/call-reports"
+
+    def start(self):
+        self.driver, self.cache_lock = create_driver()
+        self.logged_in = False
+
+    def reload_report(self, budget):
+        self.driver.get(self.report_url)
+        return wait_for_landing(self.driver, budget) == 'report'
+
+    def resume_session(self, session, budget):
+        # Cookies and storage can only be set for the origin currently loaded
+        driver = self.driver
+        driver.get(self.origin + "/")
+        for cookie in session['cookies']:
+            try:
+                driver.add_cookie(cookie)
+            except Exception as e:
+                _logger.debug(f"Skipping cookie {cookie.get('name')}: {e}")
+        driver.execute_script(RESTORE_LOCAL_STORAGE_JS, session['local_storage'])
+        return self.reload_report(budget)
+
+    def form_login(self, budget):
+        return login_3cx(self.driver, self.login_url, budget)
+
+    def session_state(self):
+        return (self.driver.get_cookies(),
+                self.driver.execute_script(DUMP_LOCAL_STORAGE_JS))
+
+    def open_report(self, budget):
+        if not self.on_report:
+            # Navigate to reports page
+            _logger.info(f"Navigating to reports URL: {self.report_url}")
+            self.driver.get(self.report_url)
+            _logger.info(
+                f"Current URL after reports navigation: {self.driver.current_url}")
+        return wait_for_report_table(self.driver, budget)
+
+    def iter_raw_pages(self, since, until, budget, result):
+        driver = self.driver
+        self.rows_sorted = True
+        with metrics.phase('filters'):
+            set_report_filters(driver, since, until, budget)
+
+        if THREECX_INGEST_MODE == 'export':
+            with metrics.phase('export'):
+                csv_path = download_report_csv(driver, budget)
+            if csv_path:
+                self.rows_sorted = False
+                try:
+                    yield from iter_csv_raw_pages(csv_path)
+                finally:
+                    shutil.rmtree(os.path.dirname(csv_path), ignore_errors=True)
+                result['complete'] = True
+                return
+            _logger.warning("CSV export failed, falling back to the table scrape")
+
+        for page_number in range(1, THREECX_MAX_PAGES + 1):
+            # Extract data from table
+            with metrics.phase('extract'):
+                if THREECX_EXTRACT_MODE == 'compare':
+                    header, raw_rows = compare_extraction_modes(driver)
+                elif THREECX_EXTRACT_MODE == 'cells':
+                    header, raw_rows = extract_rows_per_cell(driver)
+                else:
+                    header, raw_rows = extract_rows_script(driver)
+            _logger.info(f"Found {len(raw_rows)} rows on page {page_number}")
+
+            if len(raw_rows) == 0:
+                _logger.warning("No rows found in table")
+                result['complete'] = True
+                return
+
+            yield header, raw_rows
+
+            if budget.expired():
+                _logger.warning(
+                    f"Run budget of {budget.seconds:.0f}s used up, stopping after page {page_number}")
+                return
+            with metrics.phase('paging'):
+                moved = goto_next_page(driver, budget)
+            if not moved:
+                # None means the last page, False means paging got stuck
+                result['complete'] = moved is None
+                return
+
+        _logger.warning(
+            f"Stopped after THREECX_MAX_PAGES={THREECX_MAX_PAGES} pages")
+
+    def alive(self):
+        return driver_alive(self.driver)
+
+    def rss_mb(self):
+        return browser_rss_mb(self.driver)
+
+    def network_usage(self):
+        try:
+            return network_log_bytes(self.driver)
+        except Exception as e:
+            _logger.debug(f"Could not read the network log: {e}")
+            return 0, 0
+
+    def debug_state(self):
+        try:
+            return (f"Current URL: {self.driver.current_url}, "
+                    f"Page source: {self.driver.page_source[:1000]}...")
+        except Exception:
+            return "Driver not responding"
+
+    def switch_tenant(self):
+        try:
+            self.driver.get('about:blank')
+            self.driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            self.driver.execute_cdp_cmd('Storage.clearDataForOrigin', {
+                'origin': self.origin, 'storageTypes': 'all'})
+        except Exception as e:
+            _logger.warning(f"Could not clear browser state: {e}")
+            return False
+        self.logged_in = self.on_report = False
+        self.set_urls()
+        return True
+
+    def close(self):
+        if self.driver is not None:
+            quit_driver(self.driver)
+            self.driver = None
+        if self.cache_lock is not None:
+            self.cache_lock.close()
+            self.cache_lock = None
+
+
+class PlaywrightBackend(ScraperBackend):
+    # Same flow as Selenium over Playwright's CDP connection, which skips
+    # chromedriver entirely. Playwright objects must stay on the thread that
+    # created them.
+    name = 'playwright'
+
+    def __init__(self):
+        self.playwright = None
+        self.browser = None
+        self.page = None
+        self.cache_lock = None
+        self.bytes_received = 0
+        self.blocked = 0
+        self.logged_in = False
+        self.on_report = False
+        self.set_urls()
+
+    def set_urls(self):
+        self.origin = THREECX_URL.rstrip('/')
+        self.login_url = self.origin + "/#/login"
+        self.report_url = self.origin + "/#/office/reports/call-reports"
+
+    def start(self):
+        args = ['--no-sandbox', '--disable-dev-shm-usage']
+        if THREECX_BROWSER_PROFILE == 'lean':
+            lean_args, self.cache_lock = lean_browser_args()
+            args += lean_args
+        self.playwright = sync_playwright().start()
+        self.browser = self.playwright.chromium.launch(headless=True, args=args)
+        self.page = self.new_page()
+        self.logged_in = False
+
+    def new_page(self):
+        context = self.browser.new_context()
+        if THREECX_BROWSER_PROFILE == 'lean':
+            context.route('**/*', self.route_request)
+        page = context.new_page()
+        cdp = context.new_cdp_session(page)
+        cdp.on('Network.loadingFinished', self.count_bytes)
+        cdp.send('Network.enable')
+        return page
+
+    def count_bytes(self, params):
+        self.bytes_received += params.get('encodedDataLength', 0)
+
+    def route_request(self, route):
+        # Only the 3CX host (and explicitly allowed ones) gets through, and
+        # from it only what the report needs to run
+        request = route.request
+        host = urlparse(request.url).hostname
+        if request.resource_type in LEAN_BLOCKED_RESOURCE_TYPES or (
+                host and host != urlparse(THREECX_URL).hostname
+                and host not in BROWSER_ALLOWED_HOSTS):
+            self.blocked += 1
+            route.abort()
+        else:
+            route.continue_()
+
+    def run_js(self, js, *args):
+        # Runs the Selenium-style snippets (arguments[i]) shared by both backends
+        return self.page.evaluate(
+            "(args) => (function () {" + js + "}).apply(null, args)", list(args))
+
+    def find_first(self, selectors, key=None):
+        # Same single probe as find_first_element, then one lookup of the
+        # selector that matched
+        selectors = selector_profile.ordered(key, selectors)
+        index = self.run_js(FIRST_MATCH_JS, selectors, False)
+        if index < 0:
+            return None
+        if key:
+            selector_profile.remember(key, selectors[index])
+        return self.page.query_selector(selectors[index])
+
+    def timed(self, budget, label, wait):
+        timeout = min(budget.wait_timeout, budget.remaining()) * 1000
+        started = time.perf_counter()
+        try:
+            result = wait(timeout)
+        except PlaywrightTimeoutError:
+            _logger.warning(
+                f"Gave up on {label} after {time.perf_counter() - started:.2f}s")
+            raise TimeoutException(label)
+        _logger.info(f"Waited {time.perf_counter() - started:.2f}s for {label}")
+        return result
+
+    def wait_for_landing(self, budget):
+        # Same contract as wait_for_landing: 'report', 'login' or 'timeout'
+        try:
+            self.timed(budget, "report or login redirect",
+                       lambda t: self.page.wait_for_function(
+                           "() => location.hash.startsWith('#/login') || "
+                           "document.querySelector('table')", timeout=t))
+        except TimeoutException:
+            return 'timeout'
+        return 'login' if '/#/login' in self.page.url else 'report'
+
+    def reload_report(self, budget):
+        self.page.goto(self.report_url, timeout=budget.remaining() * 1000)
+        return self.wait_for_landing(budget) == 'report'
+
+    def resume_session(self, session, budget):
+        context = self.page.context
+        for cookie in session['cookies']:
+            try:
+                context.add_cookies([playwright_cookie(cookie)])
+            except Exception as e:
+                _logger.debug(f"Skipping cookie {cookie.get('name')}: {e}")
+        self.page.goto(self.origin + "/", timeout=budget.remaining() * 1000)
+        self.run_js(RESTORE_LOCAL_STORAGE_JS, session['local_storage'])
+        return self.reload_report(budget)
+
+    def session_state(self):
+        return ([selenium_cookie(cookie) for cookie in self.page.context.cookies()],
+                self.run_js(DUMP_LOCAL_STORAGE_JS))
+
+    def form_login(self, budget):
+        page = self.page
+        page.goto(self.login_url, timeout=budget.remaining() * 1000)
+        if '/#/login' not in page.url:
+            return True
+        # One combined wait over the CSS candidates
+        user_css = ', '.join(selector for selector in LOGIN_USER_SELECTORS
+                             if not selector.startswith('/'))
+        try:
+            self.timed(budget, "login form", lambda t: page.wait_for_selector(
+                user_css, state='visible', timeout=t))
+        except TimeoutException:
+            _logger.error("Could not find login input element")
+            return False
+        controls = [self.find_first(LOGIN_USER_SELECTORS, 'login_user'),
+                    self.find_first(LOGIN_PASSWORD_SELECTORS, 'login_password'),
+                    self.find_first(LOGIN_SUBMIT_SELECTORS, 'login_submit')]
+        if not all(controls):
+            _logger.error("Could not find the login form controls")
+            return False
+        controls[0].fill(THREECX_USER)
+        controls[1].fill(THREECX_PASS)
+        controls[2].click()
+        self.timed(budget, "post-login route", lambda t: page.wait_for_function(
+            "() => !location.hash.startsWith('#/login')", timeout=t))
+        return True
+
+    def open_report(self, budget):
+        page = self.page
+        if not self.on_report:
+            page.goto(self.report_url, timeout=budget.remaining() * 1000)
+        try:
+            self.timed(budget, "loading spinner to clear",
+                       lambda t: page.wait_for_selector(
+                           '.loading', state='hidden', timeout=t))
+            self.timed(budget, "table rows", lambda t: page.wait_for_selector(
+                'table tbody tr', timeout=t))
+        except TimeoutException:
+            _logger.error("Table not found within timeout")
+            return False
+        return True
+
+    def iter_raw_pages(self, since, until, budget, result):
+        with metrics.phase('filters'):
+            self.set_filters(since, until, budget)
+
+        for page_number in range(1, THREECX_MAX_PAGES + 1):
+            with metrics.phase('extract'):
+                table = self.run_js(EXTRACT_ROWS_JS) or {}
+                raw_rows = table.get('rows') or []
+            _logger.info(f"Found {len(raw_rows)} rows on page {page_number}")
+            if not raw_rows:
+                result['complete'] = True
+                return
+            yield table.get('header') or [], raw_rows
+
+            if budget.expired():
+                return
+            with metrics.phase('paging'):
+                moved = self.next_page(budget)
+            if not moved:
+                result['complete'] = moved is None
+                return
 
-    # Add environment variables check
-    _logger.info("Checking environment variables...")
-    required_vars = ['THREECX_URL', 'THREECX_USER', 'THREECX_PASS']
-    for var in required_vars:
-        if not os.getenv(var):
-            _logger.error(f"Missing required environment variable: {var}")
-            return []
-        else:
-            _logger.info(f"{var} is set")
+    def set_filters(self, since, until, budget):
+        from_input = self.find_first(DATE_FROM_SELECTORS, 'date_from')
+        to_input = self.find_first(DATE_TO_SELECTORS, 'date_to')
+        if from_input and to_input:
+            self.run_js(SET_INPUT_JS, from_input,
+                        since.strftime('%Y-%m-%d'), since.strftime('%m/%d/%Y'))
+            self.run_js(SET_INPUT_JS, to_input,
+                        until.strftime('%Y-%m-%d'), until.strftime('%m/%d/%Y'))
+            apply_button = self.find_first(APPLY_FILTER_SELECTORS, 'apply_filter')
+            if apply_button:
+                apply_button.click()
+        page_size_select = self.find_first(PAGE_SIZE_SELECTORS, 'page_size')
+        if page_size_select:
+            self.run_js(MAX_PAGE_SIZE_JS, page_size_select)
+        self.open_table_wait(budget)
 
-    chrome_service = Service(executable_path=os.getenv(
-        "CHROMEDRIVER_PATH", "/usr/bin/chromedriver"))
+    def next_page(self, budget):
+        # Same contract as goto_next_page: None on the last page
+        next_button = self.find_first(NEXT_PAGE_SELECTORS, 'next_page')
+        if not next_button or self.run_js(NEXT_DISABLED_JS, next_button):
+            return None
+        before = self.run_js(FIRST_ROW_TEXT_JS)
+        next_button.click()
+        try:
+            self.timed(budget, "table to change",
+                       lambda t: self.page.wait_for_function(
+                           "(before) => { var r = document.querySelector("
+                           "'table tbody tr'); return r && r.innerText !== before; }",
+                           arg=before, timeout=t))
+        except TimeoutException:
+            return False
+        self.open_table_wait(budget)
+        return True
 
-    try:
-        driver = webdriver.Chrome(service=chrome_service, options=opts)
-        _logger.info("Chrome driver initialized successfully")
+    def open_table_wait(self, budget):
+        try:
+            self.timed(budget, "loading spinner to clear",
+                       lambda t: self.page.wait_for_selector(
+                           '.loading', state='hidden', timeout=t))
+        except TimeoutException:
+            pass
 
-        # Navigate to login page
-        _logger.info(f"Navigating to login URL: {login_url}")
-        driver.get(login_url)
-        _logger.info(f"Current URL after navigation: {driver.current_url}")
+    def alive(self):
+        return self.browser is not None and self.browser.is_connected()
 
-        # Wait for page to load and take screenshot for debugging
-        time.sleep(5)
-        _logger.info("Page loaded, checking for login elements...")
+    def rss_mb(self):
+        # Playwright's driver and the browser it launched
+        try:
+            procs = psutil.Process().children(recursive=True)
+        except psutil.Error:
+            return 0.0
+        total = 0
+        for proc in procs:
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
 
-        # Check if we're already logged in or redirected
-        current_url = driver.current_url
-        _logger.info(f"Current URL: {current_url}")
+    def network_usage(self):
+        usage = (self.bytes_received, self.blocked)
+        self.bytes_received = self.blocked = 0
+        return usage
 
-        # More flexible element waiting
+    def debug_state(self):
         try:
-            # Try multiple possible login input selectors
-            login_element = None
-            possible_selectors = [
-                (By.ID, 'loginInput'),
-                (By.NAME, 'username'),
-                (By.NAME, 'login'),
-                (By.CSS_SELECTOR, 'input[type="text"]'),
-                (By.CSS_SELECTOR, 'input[placeholder*="user"]'),
-                (By.CSS_SELECTOR, 'input[placeholder*="User"]'),
-                (By.CSS_SELECTOR, 'input[placeholder*="name"]')
-            ]
+            return f"Current URL: {self.page.url}"
+        except Exception:
+            return "Browser not responding"
 
-            for selector_type, selector_value in possible_selectors:
-                try:
-                    login_element = WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located(
-                            (selector_type, selector_value))
-                    )
-                    _logger.info(
-                        f"Found login element with selector: {selector_type}={selector_value}")
-                    break
-                except TimeoutException:
-                    continue
+    def switch_tenant(self):
+        # A fresh context shares nothing with the previous one but the
+        # browser process itself
+        try:
+            self.page.context.close()
+            self.page = self.new_page()
+        except Exception as e:
+            _logger.warning(f"Could not open a new browser context: {e}")
+            return False
+        self.logged_in = self.on_report = False
+        self.set_urls()
+        return True
 
-            if not login_element:
-                _logger.error("Could not find login input element")
-                _logger.info(f"Page source: {driver.page_source[:1000]}...")
-                return []
-
-            # Clear and enter username
-            login_element.clear()
-            login_element.send_keys(THREECX_USER)
-            _logger.info("Username entered")
-
-            # Find password field
-            password_element = None
-            password_selectors = [
-                (By.ID, 'passwordInput'),
-                (By.NAME, 'password'),
-                (By.CSS_SELECTOR, 'input[type="password"]'),
-                (By.CSS_SELECTOR, 'input[placeholder*="pass"]'),
-                (By.CSS_SELECTOR, 'input[placeholder*="Pass"]')
-            ]
+    def close(self):
+        for closer in (self.browser, self.playwright):
+            if closer is None:
+                continue
+            try:
+                closer.close() if closer is self.browser else closer.stop()
+            except Exception as e:
+                _logger.warning(f"Error closing Playwright: {e}")
+        self.browser = self.playwright = None
+        if self.cache_lock is not None:
+            self.cache_lock.close()
+            self.cache_lock = None
 
-            for selector_type, selector_value in password_selectors:
-                try:
-                    password_element = driver.find_element(
-                        selector_type, selector_value)
-                    _logger.info(
-                        f"Found password element with selector: {selector_type}={selector_value}")
-                    break
-                except NoSuchElementException:
-                    continue
 
-            if not password_element:
-                _logger.error("Could not find password input element")
-                return []
-
-            password_element.clear()
-            password_element.send_keys(THREECX_PASS)
-            _logger.info("Password entered")
-
-            # Find and click submit button
-            submit_button = None
-            submit_selectors = [
-                (By.ID, "submitBtn"),
-                (By.CSS_SELECTOR, 'button[type="submit"]'),
-                (By.CSS_SELECTOR, 'input[type="submit"]'),
-                (By.CSS_SELECTOR, 'button:contains("Login")'),
-                (By.CSS_SELECTOR, 'button:contains("Sign")'),
-                (By.XPATH, "//button[contains(text(), 'Login')]"),
-                (By.XPATH, "//button[contains(text(), 'Sign')]"),
-                (By.XPATH, "//input[@type='submit']")
-            ]
+class APIBackend(ScraperBackend):
+    name = 'api'
 
-            for selector_type, selector_value in submit_selectors:
-                try:
-                    submit_button = driver.find_element(
-                        selector_type, selector_value)
-                    _logger.info(
-                        f"Found submit button with selector: {selector_type}={selector_value}")
-                    break
-                except NoSuchElementException:
-                    continue
+    def __init__(self, client=None):
+        self.client = client
 
-            if not submit_button:
-                _logger.error("Could not find submit button")
-                return []
+    def start(self):
+        self.client = self.client or ThreeCXClient()
 
-            submit_button.click()
-            _logger.info("Submit button clicked")
+    def login(self, budget):
+        self.client.login()
+        return True
 
-            # Wait for login to complete
-            time.sleep(sleep_time)
-            _logger.info(f"Current URL after login: {driver.current_url}")
+    def switch_tenant(self):
+        self.client.close()
+        self.client = ThreeCXClient()
+        return True
 
-        except TimeoutException as e:
-            _logger.error(f"Timeout waiting for login elements: {e}")
-            _logger.info(f"Page source: {driver.page_source}")
-            return []
+    def open_report(self, budget):
+        return True
 
-        # Navigate to reports page
-        _logger.info(f"Navigating to reports URL: {report_url}")
-        driver.get(report_url)
-        time.sleep(sleep_time)
+    def network_usage(self):
+        received, self.client.bytes_received = self.client.bytes_received, 0
+        return received, 0
+
+    def iter_raw_pages(self, since, until, budget, result):
+        pages = self.client.iter_call_log(since, until)
+        while True:
+            with metrics.phase('extract'):
+                entries = next(pages, None)
+                if entries is None:
+                    break
+                raw_rows = []
+                for entry in entries:
+                    try:
+                        raw_rows.append(api_entry_to_cells(entry))
+                    except Exception as e:
+                        _logger.error(f"Error processing call log entry: {e}")
+            yield [], raw_rows
+        result['complete'] = True
         _logger.info(
-            f"Current URL after reports navigation: {driver.current_url}")
+            f"3CX API read took {self.client.request_count} requests")
 
-        # Wait for loading to complete
-        try:
-            WebDriverWait(driver, timeout_time).until(
-                EC.invisibility_of_element_located(
-                    (By.CSS_SELECTOR, '.loading'))
-            )
-            _logger.info("Loading completed")
-        except TimeoutException:
-            _logger.warning(
-                "Loading element not found or didn't disappear, continuing...")
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+
+
+BACKENDS = {
+    'selenium': SeleniumBackend,
+    'playwright': PlaywrightBackend,
+    'api': APIBackend,
+}
+
+
+def backend_candidates(name):
+    # auto tries the lighter Playwright path first and falls back to Selenium,
+    # unless a setting only Selenium acts on is in use
+    if name == 'auto':
+        return sorted(['playwright', 'selenium'],
+                      key=lambda c: len(BACKENDS[c].ignored_options()))
+    if name == 'browser':
+        return ['selenium']
+    return [name]
 
-        # Wait for table to appear
+
+def open_backend_report(scraper, budget):
+    with metrics.phase('login'):
+        if not scraper.login(budget):
+            return False
+    with metrics.phase('report_load'):
+        return scraper.open_report(budget)
+
+
+def start_backend(budget, name=None):
+    # Returns the first backend that gets as far as a loaded report
+    for candidate in backend_candidates(name or THREECX_BACKEND):
+        scraper = BACKENDS[candidate]()
+        for option in scraper.ignored_options():
+            _logger.warning(f"{candidate} backend ignores {option}")
+        started = time.perf_counter()
         try:
-            WebDriverWait(driver, timeout_time).until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, 'table tbody tr'))
-            )
-            _logger.info("Table found")
-        except TimeoutException:
-            _logger.error("Table not found within timeout")
-            _logger.info(f"Page source: {driver.page_source}")
-            return []
+            with metrics.phase('backend_start'):
+                scraper.start()
+            ready = open_backend_report(scraper, budget)
+        except Exception as e:
+            _logger.warning(f"{candidate} backend failed: {e}")
+            ready = False
+        if ready:
+            _logger.info(
+                f"Using {candidate} backend, report ready in "
+                f"{time.perf_counter() - started:.1f}s")
+            return scraper
+        _logger.warning(f"{candidate} backend could not open the call report")
+        scraper.close()
+    return None
 
-        # Extract data from table
-        rows = driver.find_elements(By.CSS_SELECTOR, 'table tbody tr')
-        _logger.info(f"Found {len(rows)} rows in table")
 
-        if len(rows) == 0:
-            _logger.warning("No rows found in table")
-            return []
+def capture_path(day, capture_dir=None):
+    return os.path.join(capture_dir or CAPTURE_DIR, f"{day:%Y-%m-%d}.jsonl.gz")
 
-        for i, row in enumerate(rows):
-            try:
-                cols = row.find_elements(By.TAG_NAME, 'td')
-                _logger.info(f"Processing row {i+1} with {len(cols)} columns")
 
-                if len(cols) < 11:
-                    _logger.warning(
-                        f"Row {i+1} has insufficient columns ({len(cols)}), skipping")
-                    continue
+def capture_page(backend, header, raw_rows):
+    # Appends one page as its own gzip member, under a lock since backfill
+    # workers share the day's file; readers see one continuous stream. Rows
+    # are kept as the report showed them, so a fixed column mapping can be
+    # replayed.
+    if not CAPTURE_DIR or not raw_rows:
+        return
+    now = datetime.now()
+    path = capture_path(now)
+    line = json.dumps({'captured_at': now.isoformat(timespec='seconds'),
+                       'backend': backend, 'header': header,
+                       'rows': raw_rows}) + "\n"
+    try:
+        with metrics.phase('capture'):
+            if not os.path.exists(path):
+                os.makedirs(CAPTURE_DIR, exist_ok=True)
+                prune_captures()
+            data = gzip.compress(line.encode(), compresslevel=6)
+            with open(path, 'ab') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.write(data)
+        metrics.count('capture_bytes', len(data))
+    except OSError as e:
+        _logger.warning(f"Could not archive raw page: {e}")
 
-                _call_time = cols[0].text.strip()
-                call_time = None
-                if _call_time:
-                    try:
-                        call_time = datetime.strptime(
-                            _call_time, "%m/%d/%Y %I:%M:%S %p")
-                    except ValueError:
-                        _logger.warning(
-                            f"Could not parse call time: {_call_time}")
-                        continue
 
-                call_id = cols[1].text.strip()
-                if not call_id:
-                    _logger.warning(f"Row {i+1} has no call ID, skipping")
-                    continue
+def prune_captures():
+    if not CAPTURE_RETENTION_DAYS:
+        return
+    cutoff = capture_path(datetime.now() - timedelta(days=CAPTURE_RETENTION_DAYS))
+    for path in glob.glob(os.path.join(CAPTURE_DIR, '*.jsonl.gz')):
+        # Names sort by date
+        if os.path.basename(path) < os.path.basename(cutoff):
+            os.remove(path)
+
+
+def capture_files(paths, since=None, until=None):
+    # Archive files under the given files or directories, oldest first,
+    # limited to capture days in [since, until)
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, '*.jsonl.gz')))
+        else:
+            files.append(path)
+    selected = []
+    for path in sorted(set(files), key=os.path.basename):
+        day = os.path.basename(path)[:10]
+        if since and day < f"{since:%Y-%m-%d}":
+            continue
+        if until and day >= f"{until:%Y-%m-%d}":
+            continue
+        selected.append(path)
+    return selected
+
+
+def iter_captured_pages(path):
+    # (captured_at as a timestamp, raw rows) per archived page, mapped by the
+    # current REPORT_COLUMNS; archives from before headers were kept hold
+    # rows already in parse order
+    with gzip.open(path, 'rt') as f:
+        for line_number, line in enumerate(f, 1):
+            try:
+                entry = json.loads(line)
+                yield (datetime.fromisoformat(entry['captured_at']).timestamp(),
+                       map_report_columns(entry.get('header') or [],
+                                          entry['rows']))
+            except (ValueError, KeyError) as e:
+                _logger.warning(f"Skipping bad line {line_number} of {path}: {e}")
 
-                _call_from = cols[2].text.strip()
-                match = re.search(r'\((\d+)\)', _call_from)
-                call_from = match.group(1) if match else _call_from
 
-                call_to = cols[3].text.strip()
-                call_type = cols[4].text.strip().lower()
-                call_status = cols[5].text.strip().lower()
+def replay_captures(paths, since=None, until=None, push=True):
+    # Re-parses archived pages and sends them the way a live run would,
+    # without starting a browser. Unchanged calls cost nothing thanks to the
+    # outbox and index hashes, so this is cheap to rerun after a parser or
+    # mapping change. Calls sent from a later read than the capture are left
+    # alone. push=False only parses, for profiling.
+    files = capture_files(paths, since, until)
+    summary = {'files': len(files), 'pages': 0, 'scraped': 0, 'confirmed': 0,
+               'failed': 0, 'complete': False, 'backend': 'replay'}
+    if not files:
+        _logger.warning(f"No capture archives found in {', '.join(paths)}")
+        return summary
+    metrics.reset()
+    state = open_state_db() if push else None
+    odoo = None
+    try:
+        for path in files:
+            _logger.info(f"Replaying {path}")
+            for captured_at, raw_rows in iter_captured_pages(path):
+                summary['pages'] += 1
+                metrics.count('pages')
+                records, _ = select_window_rows(raw_rows, '', '9999', set(),
+                                                newest_first=False)
+                summary['scraped'] += len(records)
+                if push and records:
+                    enqueue_records(state, records, seen_at=captured_at)
+            if push:
+                drained = drain_outbox(state, odoo, max_wait=0)
+                odoo = drained['odoo']
+                summary['confirmed'] += drained['done']
+        if push:
+            drained = drain_outbox(state, odoo)
+            summary['confirmed'] += drained['done']
+            summary['failed'] = drained['pending']
+        summary['complete'] = True
+    except Exception as e:
+        summary['error'] = e
+        _logger.error(f"Replay stopped: {e}")
+    finally:
+        if state is not None:
+            state.close()
+    write_run_metrics(summary)
+    _logger.info(
+        f"Replayed {summary['pages']} pages from {summary['files']} files: "
+        f"{summary['scraped']} records, {summary['confirmed']} acknowledged")
+    return summary
+
 
-                _call_ringing_time = cols[7].text.strip()
-                ringing_time = hms_to_ceil_float_hours(_call_ringing_time)
+def sample_backend_usage(scraper):
+    received, blocked = scraper.network_usage()
+    metrics.count('bytes_transferred', received)
+    if blocked:
+        metrics.count('requests_blocked', blocked)
+    metrics.peak('browser_rss_mb', scraper.rss_mb())
 
-                _call_talking_time = cols[8].text.strip()
-                talking_time = hms_to_ceil_float_hours(_call_talking_time)
 
-                call_cost = cols[9].text.strip()
-                call_activity_details = cols[10].text.strip()
+def iter_backend_pages(scraper, budget, since=None, until=None, seen_ids=None,
+                       result=None):
+    # result, if given, gets result['complete'] = True once the walk ends at
+    # the window start or the last page rather than on an error
+    seen_ids = seen_ids or set()
+    result = result if result is not None else {}
+    result['complete'] = False
+    result['backend'] = scraper.name
+    until = until or datetime.now()
+    since = since or until - timedelta(hours=THREECX_WINDOW_HOURS)
+    since_str = since.strftime('%Y-%m-%d %H:%M:%S')
+    until_str = until.strftime('%Y-%m-%d %H:%M:%S')
+    scraped_count = 0
 
-                data_rows.append({
-                    'call_id': call_id,
-                    'call_from': call_from,
-                    'call_to': call_to,
-                    'call_time': call_time.strftime('%Y-%m-%d %H:%M:%S'),
-                    'call_type': call_type,
-                    'call_status': call_status,
-                    'call_ringing_time': ringing_time,
-                    'call_talking_time': talking_time,
-                    'call_cost': call_cost,
-                    'call_activity_details': call_activity_details,
-                })
+    started = time.perf_counter()
+    pages = scraper.iter_raw_pages(since, until, budget, result)
+    try:
+        for page_number, (header, raw_rows) in enumerate(pages, 1):
+            metrics.count('pages')
+            sample_backend_usage(scraper)
+            capture_page(scraper.name, header, raw_rows)
+            raw_rows = map_report_columns(header, raw_rows)
+            page_rows, reached_window_start = select_window_rows(
+                raw_rows, since_str, until_str, seen_ids, scraper.rows_sorted)
+            scraped_count += len(page_rows)
+            yield page_rows
 
+            if reached_window_start:
                 _logger.info(
-                    f"Successfully processed row {i+1}: Call ID {call_id}")
+                    f"Reached rows older than {since_str} on page {page_number}, stopping")
+                result['complete'] = True
+                break
+    finally:
+        pages.close()
+        sample_backend_usage(scraper)
+        result['backend_seconds'] = time.perf_counter() - started
 
-            except Exception as e:
-                _logger.error(f"Error processing row {i+1}: {e}")
-                continue
+    _logger.info(f"Successfully scraped {scraped_count} records")
 
-        _logger.info(f"Successfully scraped {len(data_rows)} records")
 
+def iter_3cx_pages(since=None, until=None, seen_ids=None, result=None,
+                   backend=None):
+    # One-shot scrape: starts a backend, walks the report and shuts it down
+    result = result if result is not None else {}
+    result['complete'] = False
+    if not check_3cx_env():
+        return
+
+    started = time.perf_counter()
+    budget = LatencyBudget()
+    scraper = start_backend(budget, backend)
+    if scraper is None:
+        _logger.error("No backend could open the call report")
+        return
+    try:
+        yield from iter_backend_pages(scraper, budget, since, until, seen_ids,
+                                      result)
     except Exception as e:
         _logger.error(f"Error during scraping: {e}")
-        _logger.error(
-            f"Current URL: {driver.current_url if 'driver' in locals() else 'Driver not initialized'}")
-        if 'driver' in locals():
-            _logger.error(f"Page source: {driver.page_source[:1000]}...")
+        _logger.error(scraper.debug_state())
     finally:
-        if 'driver' in locals():
-            driver.quit()
-            _logger.info("Chrome driver closed")
+        scraper.close()
+        result['backend_seconds'] = time.perf_counter() - started
+        _logger.info(
+            f"{scraper.name} backend run took {result['backend_seconds']:.1f}s")
+
 
+def scrape_3cx(since=None, until=None):
+    data_rows = []
+    for page_rows in iter_3cx_pages(since, until):
+        data_rows.extend(page_rows)
     return data_rows
 
 
-def push_to_odoo(records):
+class OdooRPCError(RuntimeError):
+    def __init__(self, error):
+        data = error.get('data') or {}
+        super().__init__(data.get('message') or error.get('message'))
+        self.name = data.get('name', '')
+
+
+class OdooModel:
+    # odoo.env['logs.3cx'].search_read(...) style access to one model
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def __getattr__(self, method):
+        def call(*args, **kwargs):
+            return self.client.execute_kw(self.name, method, list(args), kwargs)
+        return call
+
+
+class OdooClient:
+    # Odoo's external JSON-RPC API over one pooled keep-alive session. The
+    # uid from login is cached in ODOO_SESSION_FILE so later runs skip the
+    # login round trip, and execute_many packs several calls into one JSON-RPC
+    # batch request when the server accepts those.
+    def __init__(self, url=None, db=None, user=None, password=None,
+                 session_file=None, batch=None):
+        url = (url or ODOO_URL).rstrip('/')
+        # A bare host means HTTPS, never a silent downgrade to HTTP
+        self.url = url if '://' in url else f"https://{url}"
+        self.db = db or ODOO_DB
+        self.user = user or ODOO_USER
+        self.password = password or ODOO_PASS
+        self.session_file = ODOO_SESSION_FILE if session_file is None \
+            else session_file
+        batch = batch or ODOO_RPC_BATCH
+        # None until the server has been probed
+        self.batching = {'1': True, '0': False}.get(batch)
+        self.uid = None
+        self.request_id = itertools.count(1)
+        self.session = requests.Session()
+        # Only failed connects are retried here: a POST that timed out or
+        # got a gateway error may still have committed, and the callers
+        # decide how to find out
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=4,
+            max_retries=urllib3.util.Retry(
+                total=3, connect=3, read=0, status=0, other=0,
+                backoff_factor=0.5))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.env = self
+
+    def __getitem__(self, model):
+        return OdooModel(self, model)
+
+    def session_key(self):
+        return f"{self.url}|{self.db}|{self.user}"
+
+    def load_session(self):
+        if not self.session_file:
+            return False
+        try:
+            with open(self.session_file) as f:
+                cached = json.load(f).get(self.session_key())
+        except (OSError, ValueError):
+            return False
+        if not cached:
+            return False
+        self.uid = cached['uid']
+        if self.batching is None:
+            self.batching = cached.get('batching')
+        return True
+
+    def save_session(self):
+        if not self.session_file:
+            return
+        try:
+            with open(self.session_file) as f:
+                sessions = json.load(f)
+        except (OSError, ValueError):
+            sessions = {}
+        sessions[self.session_key()] = {'uid': self.uid,
+                                        'batching': self.batching}
+        try:
+            write_atomic(self.session_file, json.dumps(sessions, indent=2))
+        except OSError as e:
+            _logger.warning(f"Could not save the Odoo session: {e}")
+
+    def connect(self):
+        if self.load_session():
+            _logger.info(f"Reusing Odoo session for uid {self.uid}")
+        else:
+            self.login()
+
+    def login(self):
+        uid = self.call('common', 'login', [self.db, self.user, self.password])
+        if not uid:
+            raise RuntimeError(f"Odoo login failed for {self.user}")
+        self.uid = uid
+        self.save_session()
+        _logger.info(f"Logged in to Odoo as uid {uid}")
+
+    def payload(self, service, method, args):
+        return {'jsonrpc': '2.0', 'method': 'call', 'id': next(self.request_id),
+                'params': {'service': service, 'method': method, 'args': args}}
+
+    def post(self, body, label):
+        started = time.perf_counter()
+        response = self.session.post(self.url + '/jsonrpc', json=body,
+                                     timeout=ODOO_RPC_TIMEOUT)
+        metrics.latency(label, time.perf_counter() - started)
+        metrics.count('odoo_http_requests')
+        response.raise_for_status()
+        return response.json()
+
+    def call(self, service, method, args, label=None):
+        reply = self.post(self.payload(service, method, args),
+                          label or f"odoo_{method}")
+        if 'error' in reply:
+            raise OdooRPCError(reply['error'])
+        return reply['result']
+
+    def object_args(self, model, method, args, kwargs):
+        return [self.db, self.uid, self.password, model, method, args,
+                kwargs or {}]
+
+    def execute_kw(self, model, method, args, kwargs=None):
+        label = f"odoo_{method}"
+        try:
+            return self.call('object', 'execute_kw',
+                             self.object_args(model, method, args, kwargs),
+                             label)
+        except OdooRPCError as e:
+            if 'AccessDenied' not in e.name:
+                raise
+        # The cached uid went stale (user recreated, database restored)
+        self.login()
+        return self.call('object', 'execute_kw',
+                         self.object_args(model, method, args, kwargs), label)
+
+    def execute_many(self, calls):
+        # calls are (model, method, args, kwargs). Returns one result or
+        # exception per call, in order; one failing call does not stop others.
+        results = []
+        for start in range(0, len(calls), ODOO_RPC_BATCH_CALLS):
+            chunk = calls[start:start + ODOO_RPC_BATCH_CALLS]
+            batched = None
+            if len(chunk) > 1 and self.batching is not False:
+                batched = self.execute_batch(chunk)
+            if batched is None:
+                batched = []
+                for model, method, args, kwargs in chunk:
+                    try:
+                        batched.append(self.execute_kw(model, method, args, kwargs))
+                    except Exception as e:
+                        batched.append(e)
+            results.extend(batched)
+        return results
+
+    def execute_batch(self, chunk, relogin=True):
+        # None when the server does not take JSON-RPC batches, in which case
+        # it has not run any of the calls either
+        bodies = [self.payload('object', 'execute_kw',
+                               self.object_args(*call)) for call in chunk]
+        try:
+            replies = self.post(bodies, 'odoo_batch')
+        except (requests.HTTPError, ValueError) as e:
+            # Refused or answered with something other than JSON
+            if self.batching:
+                raise
+            replies = None
+            _logger.debug(f"Batch probe failed: {e}")
+        if not isinstance(replies, list):
+            if self.batching is None:
+                _logger.info("Odoo does not accept batched calls, "
+                             "sending them one by one")
+                self.batching = False
+                self.save_session()
+            return None
+        if self.batching is None:
+            self.batching = True
+            self.save_session()
+        by_id = {reply.get('id'): reply for reply in replies}
+        results = []
+        for body in bodies:
+            reply = by_id.get(body['id'], {'error': {'message': 'no reply'}})
+            results.append(OdooRPCError(reply['error'])
+                           if 'error' in reply else reply['result'])
+        if relogin and any(isinstance(result, OdooRPCError)
+                           and 'AccessDenied' in result.name
+                           for result in results):
+            # A stale uid fails every call alike, so none of them ran
+            self.login()
+            return self.execute_batch(chunk, relogin=False)
+        return results
+
+    def close(self):
+        self.session.close()
+
+
+def connect_odoo():
+    odoo = OdooClient()
+    _logger.info(f"Connecting to Odoo at: {odoo.url}")
+    with metrics.phase('odoo_connect'):
+        odoo.connect()
+    return odoo
+
+
+def changed_values(rec, previous):
+    # The fields of rec that differ from previous, a record as last sent or
+    # as Odoo returned it (empty values come back as False there, floats may
+    # have lost their exact form). Empty means nothing changed.
+    changed = {}
+    for field, value in rec.items():
+        theirs = previous.get(field)
+        if isinstance(value, float) or isinstance(theirs, float):
+            same = abs((value or 0.0) - (theirs or 0.0)) <= 1e-6
+        else:
+            same = (value or '') == (theirs or '')
+        if not same and field != 'call_id':
+            changed[field] = value
+    return changed
+
+
+def write_changed_records(odoo, changed):
+    # changed is [(odoo_id, rec, values to write)]. Records getting identical
+    # values share one write call, and the writes go out batched. Returns the
+    # (odoo_id, rec) written and the number of RPCs.
+    groups = {}
+    for odoo_id, rec, values in changed:
+        key = json.dumps(values, sort_keys=True)
+        groups.setdefault(key, (values, []))[1].append((odoo_id, rec))
+
+    groups = list(groups.values())
+    with metrics.phase('odoo_write'):
+        results = odoo.execute_many(
+            [('logs.3cx', 'write',
+              [[odoo_id for odoo_id, _ in members], values], {})
+             for values, members in groups])
+    written = []
+    rpc_count = len(groups)
+    for (values, members), result in zip(groups, results):
+        if isinstance(result, Exception):
+            _logger.error(
+                f"Error updating {len(members)} changed records: {result}")
+        else:
+            written.extend(members)
+    _logger.info(
+        f"Updated {len(written)} changed records in Odoo using {rpc_count} writes")
+    return written, rpc_count
+
+
+def lookup_records(model, records):
+    # Looks the records up by call_id. Returns the ones Odoo lacks, the
+    # (odoo_id, rec, values) of ones whose copy differs and the (odoo_id, rec)
+    # of ones it already holds as they are.
+    existing = model.search_read(
+        [('call_id', 'in', [rec['call_id'] for rec in records])],
+        list(records[0]))
+    rows = {row['call_id']: row for row in existing}
+    missing = []
+    changed = []
+    found = []
+    for rec in records:
+        row = rows.get(rec['call_id'])
+        if row is None:
+            missing.append(rec)
+            continue
+        values = changed_values(rec, row)
+        if values:
+            changed.append((row['id'], rec, values))
+        else:
+            found.append((row['id'], rec))
+    return missing, changed, found
+
+
+def push_to_odoo(records, batch_size=None, odoo=None, state=None):
+    # Returns the call_ids Odoo now holds with the given content: created,
+    # updated or already there. Given the state database, the local index
+    # answers for call_ids pushed recently, and a call whose content hash is
+    # unchanged costs nothing. The index can be an old snapshot (a restored
+    # cache, a run that never saved), so only its hits are trusted: every
+    # miss is looked up in Odoo before anything is created.
     if not records:
         _logger.info("No records to push to Odoo")
-        return
+        return []
+
+    batch_size = batch_size or ODOO_BATCH_SIZE
+    rpc_count = 0
+    created_count = 0
+    written_count = 0
+    known = {}
+    if state is not None:
+        known = load_known_calls(state, (rec['call_id'] for rec in records))
+    unchanged_ids = {rec['call_id'] for rec in records
+                     if rec['call_id'] in known
+                     and known[rec['call_id']][0] == record_hash(rec)}
+    metrics.count('known_index_hits', len(known))
+    metrics.count('records_unchanged', len(unchanged_ids))
+    confirmed_ids = list(unchanged_ids)
+    # (odoo_id, rec) as Odoo now holds them, for the index
+    learned = []
+
+    new_records = []
+    # (odoo_id, rec, values) of known calls whose content changed
+    changed = []
+    # Records whose presence or Odoo id has to be looked up first, in one
+    # search_read per push
+    unsure = []
+    seen_ids = set(unchanged_ids)
+    for rec in records:
+        call_id = rec['call_id']
+        if call_id in seen_ids:
+            continue
+        seen_ids.add(call_id)
+        _, odoo_id, previous = known.get(call_id, (None, None, None))
+        if odoo_id and previous:
+            changed.append((odoo_id, rec, changed_values(rec, previous)))
+        else:
+            # Not in the index, or learned from a re-sync without what was
+            # sent, so Odoo's copy decides
+            unsure.append(rec)
 
     try:
-        # Clean URL for Odoo connection
-        clean_url = ODOO_URL.replace('https://', '').replace('http://', '')
-        _logger.info(f"Connecting to Odoo at: {clean_url}")
+        if new_records or changed or unsure:
+            odoo = odoo or connect_odoo()
+            model = odoo.env['logs.3cx']
 
-        odoo = odoorpc.ODOO(clean_url, port=80)
-        odoo.login(ODOO_DB, ODOO_USER, ODOO_PASS)
-        model = odoo.env['logs.3cx']
+            if unsure:
+                with metrics.phase('odoo_search'):
+                    missing, differing, found = lookup_records(model, unsure)
+                rpc_count += 1
+                new_records.extend(missing)
+                changed.extend(differing)
+                confirmed_ids.extend(rec['call_id'] for _, rec in found)
+                learned.extend(found)
 
-        created_count = 0
-        for rec in records:
-            try:
-                if model.search([('call_id', '=', rec['call_id'])]):
-                    _logger.info(
-                        f"Record with call_id {rec['call_id']} already exists, skipping")
+            _logger.info(
+                f"{len(unchanged_ids)} call_ids unchanged, {len(unsure)} looked "
+                f"up in Odoo, updating {len(changed)}, creating "
+                f"{len(new_records)} in chunks of {batch_size}")
+
+            if changed:
+                written, write_rpcs = write_changed_records(odoo, changed)
+                rpc_count += write_rpcs
+                written_count = len(written)
+                confirmed_ids.extend(rec['call_id'] for _, rec in written)
+                learned.extend(written)
+
+            chunks = [new_records[start:start + batch_size]
+                      for start in range(0, len(new_records), batch_size)]
+            with metrics.phase('odoo_create'):
+                results = odoo.execute_many(
+                    [('logs.3cx', 'create', [chunk], {}) for chunk in chunks])
+            rpc_count += len(chunks)
+            retry = []
+            for chunk, odoo_ids in zip(chunks, results):
+                if isinstance(odoo_ids, Exception):
+                    _logger.error(
+                        f"Error creating chunk of {len(chunk)} records: "
+                        f"{odoo_ids}, retrying one by one")
+                    # Isolate the bad record(s) so the rest of the chunk still lands
+                    retry.extend(chunk)
                     continue
+                created_count += len(chunk)
+                confirmed_ids.extend(rec['call_id'] for rec in chunk)
+                if not isinstance(odoo_ids, list):
+                    odoo_ids = [None] * len(chunk)
+                learned.extend(zip(odoo_ids, chunk))
 
-                _logger.info(f"Creating record: {rec['call_id']}")
-                model.create(rec)
-                created_count += 1
+            if retry:
+                # A chunk that timed out may still have committed, so only
+                # the records Odoo does not hold are created again
+                with metrics.phase('odoo_search'):
+                    retry, differing, found = lookup_records(model, retry)
+                rpc_count += 1
+                confirmed_ids.extend(rec['call_id'] for _, rec in found)
+                learned.extend(found)
+                if differing:
+                    written, write_rpcs = write_changed_records(odoo, differing)
+                    rpc_count += write_rpcs
+                    written_count += len(written)
+                    confirmed_ids.extend(rec['call_id'] for _, rec in written)
+                    learned.extend(written)
 
-            except Exception as e:
-                _logger.error(f"Error creating record {rec['call_id']}: {e}")
-                continue
+            if retry:
+                with metrics.phase('odoo_create'):
+                    results = odoo.execute_many(
+                        [('logs.3cx', 'create', [rec], {}) for rec in retry])
+                rpc_count += len(retry)
+                for rec, odoo_id in zip(retry, results):
+                    if isinstance(odoo_id, Exception):
+                        _logger.error(
+                            f"Error creating record {rec['call_id']}: {odoo_id}")
+                        continue
+                    created_count += 1
+                    confirmed_ids.append(rec['call_id'])
+                    learned.append((odoo_id, rec))
 
-        _logger.info(
-            f"Successfully created {created_count} new records in Odoo")
+            _logger.info(
+                f"Successfully created {created_count} new records in Odoo "
+                f"using {rpc_count} RPCs")
+        else:
+            _logger.info(
+                f"All {len(unchanged_ids)} call_ids unchanged, nothing to send")
 
     except Exception as e:
         _logger.error(f"Error connecting to Odoo: {e}")
 
+    if state is not None and learned:
+        remember_known_calls(state, learned)
+    metrics.count('odoo_rpcs', rpc_count)
+    metrics.count('odoo_created', created_count)
+    metrics.count('odoo_updated', written_count)
+    metrics.count('odoo_existing',
+                  len(confirmed_ids) - created_count - written_count)
+    metrics.count('odoo_not_confirmed', len(records) - len(confirmed_ids))
+    return confirmed_ids
 
-if __name__ == "__main__":
-    _logger.info("Starting 3CX scraper...")
-    scraped_data = scrape_3cx()
-    _logger.info(f"Scraped {len(scraped_data)} records")
 
-    if scraped_data:
-        push_to_odoo(scraped_data)
-        _logger.info("Scraping completed successfully")
+# Marks the end of the page stream on the pipeline queue
+_PIPELINE_DONE = object()
+
+
+def run_pipeline(pages, consume, maxsize=None):
+    # Scrapes on the calling thread, since browser objects (Playwright's in
+    # particular) belong to the thread that created them, while a writer
+    # thread consumes pages. The bounded queue holds the scraper back when
+    # Odoo falls behind. An error on either side stops both and is re-raised
+    # here once the writer has finished what was already queued.
+    pages_queue = queue.Queue(maxsize=maxsize or PIPELINE_QUEUE_PAGES)
+    stop = threading.Event()
+    errors = []
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                pages_queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def write():
+        try:
+            while True:
+                item = pages_queue.get()
+                if item is _PIPELINE_DONE:
+                    break
+                consume(item)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+
+    writer = threading.Thread(target=write, name="odoo-writer", daemon=True)
+    writer.start()
+    try:
+        for page in pages:
+            if not put(page):
+                break
+    finally:
+        # Runs the generator's own cleanup (driver.quit) right away
+        close = getattr(pages, 'close', None)
+        if close:
+            close()
+        put(_PIPELINE_DONE)
+        writer.join()
+
+    if errors:
+        raise errors[0]
+
+
+def run_incremental(state, iter_pages, odoo=None):
+    # iter_pages(since, until, seen_ids, result) yields pages of records
+    summary = {'scraped': 0, 'confirmed': 0, 'failed': 0, 'complete': False,
+               'odoo': odoo, 'error': None}
+    confirmed = []
+    failed = []
+
+    mark_time, mark_ids = load_high_water_mark(state)
+    until = datetime.now()
+    since = until - timedelta(hours=THREECX_WINDOW_HOURS)
+    if mark_time:
+        _logger.info(f"Resuming after high-water mark {mark_time}")
+        since = max(since, datetime.strptime(mark_time, '%Y-%m-%d %H:%M:%S')
+                    - timedelta(minutes=THREECX_RESCAN_MINUTES))
+
+    def push_page(page_rows):
+        nonlocal odoo
+        summary['scraped'] += len(page_rows)
+        if not page_rows:
+            return
+        # Rows are durable in the outbox before Odoo is contacted at all;
+        # retries are left to later drains rather than stalling the scrape
+        enqueue_records(state, page_rows)
+        odoo = drain_outbox(state, odoo, max_wait=0)['odoo']
+        pushed_ids = outbox_done_ids(
+            state, (rec['call_id'] for rec in page_rows))
+        for rec in page_rows:
+            pair = (rec['call_time'], rec['call_id'])
+            (confirmed if rec['call_id'] in pushed_ids else failed).append(pair)
+
+    # Push each page while the browser is already scraping the next one
+    result = {}
+    try:
+        run_pipeline(iter_pages(since, until, mark_ids, result), push_page)
+    except Exception as e:
+        _logger.error(f"Pipeline stopped: {e}")
+        summary['error'] = e
+
+    # Only a walk that got all the way back to the mark may move it forward,
+    # otherwise the rows between the mark and where scraping died are lost
+    if result.get('complete') and confirmed:
+        advance_high_water_mark(state, confirmed, failed)
+    elif confirmed:
+        _logger.warning("Scrape did not complete, high-water mark unchanged")
+
+    summary.update(confirmed=len(confirmed), failed=len(failed),
+                   complete=bool(result.get('complete')), odoo=odoo,
+                   backend=result.get('backend'))
+    if result.get('backend'):
+        record_backend_run(state, result['backend'],
+                           result.get('backend_seconds'), summary['scraped'],
+                           summary['complete'])
+    return summary
+
+
+def write_run_metrics(summary, **extra):
+    # Ends a run's metrics with its outcome; a broken metrics path must not
+    # fail the run itself
+    error = summary.get('error')
+    try:
+        written = metrics.write(
+            backend=summary.get('backend'), scraped=summary.get('scraped', 0),
+            confirmed=summary.get('confirmed', 0),
+            failed=summary.get('failed', 0),
+            complete=bool(summary.get('complete')),
+            error=str(error) if error else None, **extra)
+    except OSError as e:
+        _logger.warning(f"Could not write run metrics: {e}")
+        return None
+    phases = ', '.join(f"{name} {seconds:.2f}s"
+                       for name, seconds in written['phases'].items())
+    _logger.info(
+        f"Run took {written['seconds']:.1f}s ({phases}), "
+        f"peak RSS {written['peak_rss_mb']:.0f} MB")
+    return written
+
+
+def browser_rss_mb(driver):
+    # chromedriver plus every Chrome process it spawned
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        procs = [root] + root.children(recursive=True)
+    except (psutil.Error, AttributeError):
+        return 0.0
+    total = 0
+    for proc in procs:
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / (1024 * 1024)
+
+
+def driver_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+def quit_driver(driver):
+    try:
+        driver.quit()
+        _logger.info("Chrome driver closed")
+    except Exception as e:
+        _logger.warning(f"Error closing Chrome driver: {e}")
+
+
+def run_daemon(interval=None, jitter=None, max_browser_rss_mb=None,
+               backend=None):
+    interval = interval or DAEMON_INTERVAL_SECONDS
+    jitter = DAEMON_JITTER_SECONDS if jitter is None else jitter
+    max_browser_rss_mb = max_browser_rss_mb or DAEMON_MAX_BROWSER_RSS_MB
+    if not check_3cx_env():
+        return
+
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+    _logger.info(
+        f"Starting daemon: every {interval:.0f}s +/- {jitter:.0f}s, "
+        f"browser restart above {max_browser_rss_mb:.0f} MB")
+    state = open_state_db()
+    scraper = None
+    odoo = None
+    cycle = 0
+
+    while not stop.is_set():
+        cycle += 1
+        started = time.monotonic()
+        budget = LatencyBudget()
+        metrics.reset()
+        summary = {}
+        try:
+            if scraper is not None:
+                rss = scraper.rss_mb()
+                _logger.info(f"Browser RSS {rss:.0f} MB")
+                if rss > max_browser_rss_mb:
+                    _logger.warning(
+                        f"Browser RSS {rss:.0f} MB over limit, restarting it")
+                    scraper.close()
+                    scraper = None
+            if scraper is None:
+                scraper = start_backend(budget, backend)
+                if scraper is None:
+                    raise RuntimeError("no backend could open the call report")
+            elif not open_backend_report(scraper, budget):
+                raise RuntimeError("call report did not load")
+
+            summary = run_incremental(
+                state,
+                lambda *args: iter_backend_pages(scraper, budget, *args),
+                odoo)
+            if summary['error']:
+                raise summary['error']
+            # Failed writes may mean a dead Odoo session, so start a new one
+            odoo = summary['odoo'] if not summary['failed'] else None
+            _logger.info(
+                f"Cycle {cycle}: scraped {summary['scraped']}, "
+                f"confirmed {summary['confirmed']}, failed {summary['failed']}")
+
+        except Exception as e:
+            _logger.error(f"Daemon cycle {cycle} failed: {e}")
+            summary['error'] = e
+            if scraper is not None and not scraper.alive():
+                _logger.warning(f"{scraper.name} browser crashed, restarting it")
+                scraper.close()
+                scraper = None
+
+        write_run_metrics(summary, cycle=cycle)
+        elapsed = time.monotonic() - started
+        delay = max(0.0, interval + random.uniform(-jitter, jitter) - elapsed)
+        _logger.info(f"Cycle {cycle} took {elapsed:.1f}s, next in {delay:.1f}s")
+        stop.wait(delay)
+
+    _logger.info("Daemon stopping")
+    if scraper is not None:
+        scraper.close()
+    state.close()
+
+
+def split_backfill_range(start, end, chunk=None):
+    # [start, end) cut into day or week chunks, newest first like the report
+    step = timedelta(weeks=1) if (chunk or BACKFILL_CHUNK) == 'week' \
+        else timedelta(days=1)
+    chunks = []
+    chunk_start = start
+    while chunk_start < end:
+        chunks.append((chunk_start, min(chunk_start + step, end)))
+        chunk_start += step
+    return chunks[::-1]
+
+
+def default_worker_count():
+    # One browser per core at most, and no more than free memory can hold
+    by_cpu = os.cpu_count() or 1
+    by_ram = int(psutil.virtual_memory().available / (1024 * 1024)
+                 // BACKFILL_MB_PER_WORKER)
+    return max(1, min(by_cpu, by_ram))
+
+
+def backfill_range_done(done, start, end):
+    # Whether the done (start, end) ranges, sorted by start, cover
+    # [start, end) without a gap
+    covered = start
+    for done_start, done_end in done:
+        if done_start <= covered < done_end:
+            covered = done_end
+        if covered >= end:
+            return True
+    return False
+
+
+def plan_backfill_chunks(conn, chunks):
+    # Chunks an earlier, interrupted backfill already covered are skipped,
+    # whatever chunk size that run used; they are recorded as done too
+    fmt = '%Y-%m-%d %H:%M:%S'
+    done = sorted(
+        (datetime.strptime(start, fmt), datetime.strptime(end, fmt))
+        for start, end in conn.execute(
+            "SELECT chunk_start, chunk_end FROM backfill_chunks "
+            "WHERE status = 'done'"))
+    pending = [(s, e) for s, e in chunks
+               if not backfill_range_done(done, s, e)]
+    conn.executemany(
+        "INSERT OR IGNORE INTO backfill_chunks (chunk_start, chunk_end) "
+        "VALUES (?, ?)",
+        [(s.strftime(fmt), e.strftime(fmt)) for s, e in chunks])
+    conn.executemany(
+        "UPDATE backfill_chunks SET status = 'done' "
+        "WHERE chunk_start = ? AND chunk_end = ?",
+        [(s.strftime(fmt), e.strftime(fmt)) for s, e in chunks
+         if (s, e) not in pending])
+    conn.commit()
+    return pending
+
+
+def record_backfill_chunk(conn, chunk_start, chunk_end, records, complete):
+    conn.execute(
+        "UPDATE backfill_chunks SET status = ?, records = ?, "
+        "attempts = attempts + 1, updated_at = ? "
+        "WHERE chunk_start = ? AND chunk_end = ?",
+        ('done' if complete else 'failed', records,
+         datetime.now().isoformat(timespec='seconds'),
+         chunk_start.strftime('%Y-%m-%d %H:%M:%S'),
+         chunk_end.strftime('%Y-%m-%d %H:%M:%S')))
+    conn.commit()
+
+
+def init_backfill_worker(session_key, session_file):
+    # Every worker resumes the session the parent saved instead of logging in
+    global THREECX_SESSION_KEY, THREECX_SESSION_FILE
+    THREECX_SESSION_KEY = session_key
+    THREECX_SESSION_FILE = session_file
+
+
+def backfill_chunk(chunk_start, chunk_end, backend=None):
+    # Runs in a worker process: scrapes one chunk into the outbox only. The
+    # parent is the single Odoo writer, so two workers never race to create
+    # the same call_id.
+    state = open_state_db()
+    result = {}
+    records = 0
+    try:
+        for page_rows in iter_3cx_pages(chunk_start,
+                                        chunk_end - timedelta(seconds=1),
+                                        set(), result, backend=backend):
+            if page_rows:
+                enqueue_records(state, page_rows)
+                records += len(page_rows)
+    finally:
+        state.close()
+    return records, bool(result.get('complete'))
+
+
+def run_backfill(start, end, chunk=None, workers=None, backend=None):
+    global THREECX_SESSION_KEY, THREECX_SESSION_FILE
+    if not check_3cx_env():
+        return None
+    workers = workers or BACKFILL_WORKERS or default_worker_count()
+    state = open_state_db()
+    chunks = split_backfill_range(start, end, chunk)
+    pending = plan_backfill_chunks(state, chunks)
+    summary = {'chunks': len(chunks), 'skipped': len(chunks) - len(pending),
+               'done': 0, 'failed': 0, 'records': 0}
+    _logger.info(
+        f"Backfilling {start:%Y-%m-%d} to {end:%Y-%m-%d}: {len(pending)} of "
+        f"{len(chunks)} {chunk or BACKFILL_CHUNK} chunks left, "
+        f"up to {workers} workers")
+    if not pending:
+        state.close()
+        return summary
+
+    # Log in once here so the workers share one authenticated session; a
+    # throwaway key is enough when no persistent session is configured
+    saved_session = (THREECX_SESSION_KEY, THREECX_SESSION_FILE)
+    session_dir = None
+    if not THREECX_SESSION_KEY:
+        session_dir = tempfile.mkdtemp(prefix='3cx_backfill_')
+        THREECX_SESSION_KEY = Fernet.generate_key().decode()
+        THREECX_SESSION_FILE = os.path.join(session_dir, 'session.bin')
+    if backend != 'api':
+        scraper = start_backend(LatencyBudget(), backend)
+        if scraper is not None:
+            scraper.close()
+
+    odoo = None
+    pool = ProcessPoolExecutor(
+        max_workers=min(workers, len(pending)),
+        initializer=init_backfill_worker,
+        initargs=(THREECX_SESSION_KEY, THREECX_SESSION_FILE))
+    try:
+        futures = {pool.submit(backfill_chunk, s, e, backend): (s, e)
+                   for s, e in pending}
+        for future in as_completed(futures):
+            chunk_start, chunk_end = futures[future]
+            try:
+                records, complete = future.result()
+            except Exception as e:
+                _logger.error(f"Backfill chunk {chunk_start:%Y-%m-%d} failed: {e}")
+                records, complete = 0, False
+            record_backfill_chunk(state, chunk_start, chunk_end, records,
+                                  complete)
+            summary['done' if complete else 'failed'] += 1
+            summary['records'] += records
+            _logger.info(
+                f"Chunk {chunk_start:%Y-%m-%d %H:%M} - {chunk_end:%Y-%m-%d %H:%M}: "
+                f"{records} records, {'done' if complete else 'incomplete'} "
+                f"({summary['done'] + summary['failed']}/{len(pending)})")
+            odoo = drain_outbox(state, odoo, max_wait=0)['odoo']
+    except KeyboardInterrupt:
+        _logger.warning("Backfill interrupted, finished chunks are checkpointed")
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        pool.shutdown(wait=True)
+        drained = drain_outbox(state, odoo)
+        if drained['pending']:
+            _logger.warning(f"{drained['pending']} outbox rows still pending")
+        state.close()
+        if session_dir:
+            shutil.rmtree(session_dir, ignore_errors=True)
+        THREECX_SESSION_KEY, THREECX_SESSION_FILE = saved_session
+
+    _logger.info(
+        f"Backfill finished: {summary['done']} chunks done, "
+        f"{summary['failed']} failed, {summary['skipped']} already done, "
+        f"{summary['records']} records")
+    return summary
+
+
+# Settings a tenant entry may override, keyed by their lower-case name in the
+# tenants file. Anything left out falls back to the environment.
+TENANT_SETTINGS = [
+    'THREECX_URL', 'THREECX_USER', 'THREECX_PASS', 'THREECX_BACKEND',
+    'ODOO_URL', 'ODOO_DB', 'ODOO_USER', 'ODOO_PASS', 'ODOO_AGGREGATE_MODEL',
+    'STATE_DB', 'THREECX_SESSION_FILE', 'THREECX_SESSION_KEY',
+    'ODOO_SESSION_FILE', 'METRICS_JSON_PATH', 'METRICS_PROM_PATH',
+    'CAPTURE_DIR', 'SELECTOR_PROFILE_FILE',
+]
+
+
+def load_tenants(path):
+    with open(path) as f:
+        config = json.load(f)
+    tenants = config['tenants'] if isinstance(config, dict) else config
+    names = set()
+    for tenant in tenants:
+        if not tenant.get('name') or tenant['name'] in names:
+            raise ValueError(f"Every tenant in {path} needs a unique name")
+        names.add(tenant['name'])
+        unknown = set(tenant) - {'name', 'timeout_seconds'} - \
+            {setting.lower() for setting in TENANT_SETTINGS}
+        if unknown:
+            raise ValueError(
+                f"Unknown settings for tenant {tenant['name']}: {sorted(unknown)}")
+    return tenants
+
+
+def apply_tenant(tenant, defaults):
+    # Worker processes serve one tenant at a time, so the module settings
+    # (and the environment check_3cx_env reads) can simply be swapped
+    name = tenant['name']
+    values = dict(defaults)
+    # Each tenant keeps its own high-water mark, outbox and session
+    values['STATE_DB'] = f"scraper_state_{name}.db"
+    values['THREECX_SESSION_FILE'] = f"3cx_session_{name}.bin"
+    values['ODOO_SESSION_FILE'] = f"odoo_session_{name}.json"
+    values['SELECTOR_PROFILE_FILE'] = f"selector_profile_{name}.json"
+    values['METRICS_JSON_PATH'] = f"scraper_metrics_{name}.json"
+    if defaults['CAPTURE_DIR']:
+        values['CAPTURE_DIR'] = os.path.join(defaults['CAPTURE_DIR'], name)
+    if defaults['METRICS_PROM_PATH']:
+        root, ext = os.path.splitext(defaults['METRICS_PROM_PATH'])
+        values['METRICS_PROM_PATH'] = f"{root}_{name}{ext}"
+    for setting in TENANT_SETTINGS:
+        if setting.lower() in tenant:
+            values[setting] = tenant[setting.lower()]
+    for setting, value in values.items():
+        globals()[setting] = value
+        if value is None:
+            os.environ.pop(setting, None)
+        else:
+            os.environ[setting] = str(value)
+
+
+def run_tenant(tenant, scraper, budget):
+    # Returns the per-tenant summary and the backend to keep for the next one
+    started = time.perf_counter()
+    metrics.reset()
+    summary = {'name': tenant['name'], 'scraped': 0, 'confirmed': 0,
+               'failed': 0, 'complete': False, 'backend': None,
+               'reused': False, 'error': None}
+    state = None
+    try:
+        if not check_3cx_env():
+            raise RuntimeError("incomplete 3CX settings")
+        if scraper is not None:
+            reusable = (scraper.name in backend_candidates(THREECX_BACKEND)
+                        and scraper.alive() and scraper.switch_tenant())
+            if not reusable:
+                scraper.close()
+                scraper = None
+        if scraper is None:
+            scraper = start_backend(budget, THREECX_BACKEND)
+            if scraper is None:
+                raise RuntimeError("no backend could open the call report")
+        else:
+            summary['reused'] = True
+            if not open_backend_report(scraper, budget):
+                raise RuntimeError("call report did not load")
+
+        state = open_state_db()
+        result = run_incremental(
+            state, lambda *args: iter_backend_pages(scraper, budget, *args))
+        if result['error']:
+            raise result['error']
+        for key in ('scraped', 'confirmed', 'failed', 'complete', 'backend'):
+            summary[key] = result[key]
+    except Exception as e:
+        _logger.error(f"Tenant {tenant['name']} failed: {e}")
+        summary['error'] = str(e)
+        if scraper is not None and not scraper.alive():
+            scraper.close()
+            scraper = None
+    finally:
+        if state is not None:
+            state.close()
+    summary['seconds'] = time.perf_counter() - started
+    write_run_metrics(summary, tenant=tenant['name'])
+    return summary, scraper
+
+
+def tenant_worker(tasks, results):
+    defaults = {setting: globals()[setting] for setting in TENANT_SETTINGS}
+    scraper = None
+    try:
+        while True:
+            tenant = tasks.get()
+            if tenant is None:
+                break
+            results.put(('started', os.getpid(), tenant['name']))
+            apply_tenant(tenant, defaults)
+            budget = LatencyBudget(min(RUN_BUDGET_SECONDS, tenant['timeout']))
+            summary, scraper = run_tenant(tenant, scraper, budget)
+            results.put(('done', os.getpid(), summary))
+    finally:
+        if scraper is not None:
+            scraper.close()
+
+
+def kill_process_tree(pid):
+    # The worker's browser and driver processes go down with it
+    try:
+        root = psutil.Process(pid)
+        procs = root.children(recursive=True) + [root]
+    except psutil.Error:
+        return
+    for proc in procs:
+        try:
+            proc.kill()
+        except psutil.Error:
+            pass
+    psutil.wait_procs(procs, timeout=10)
+
+
+def run_tenants(tenants, workers=None, backend=None):
+    # Bounded pool of long-lived workers, each keeping its browser across the
+    # tenants it serves. A tenant past its timeout or a crashed worker is
+    # killed and replaced without holding up the others.
+    workers = min(workers or default_worker_count(), len(tenants)) or 1
+    tasks = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    by_name = {}
+    for tenant in tenants:
+        tenant = dict(tenant)
+        tenant.setdefault('threecx_backend', backend or THREECX_BACKEND)
+        tenant['timeout'] = float(
+            tenant.pop('timeout_seconds', TENANT_TIMEOUT_SECONDS))
+        by_name[tenant['name']] = tenant
+        tasks.put(tenant)
+    for _ in range(workers):
+        tasks.put(None)
+
+    def spawn():
+        proc = multiprocessing.Process(target=tenant_worker,
+                                       args=(tasks, results), daemon=True)
+        proc.start()
+        return proc
+
+    _logger.info(f"Running {len(tenants)} tenants on {workers} workers")
+    procs = {}
+    for _ in range(workers):
+        proc = spawn()
+        procs[proc.pid] = proc
+    running = {}
+    summaries = {}
+
+    def give_up(pid, error):
+        name, started = running.pop(pid)
+        kill_process_tree(pid)
+        procs.pop(pid).join()
+        summaries[name] = {'name': name, 'scraped': 0, 'confirmed': 0,
+                           'failed': 0, 'complete': False, 'backend': None,
+                           'reused': False, 'error': error,
+                           'seconds': time.monotonic() - started}
+        _logger.error(f"Tenant {name}: {error}")
+        proc = spawn()
+        procs[proc.pid] = proc
+
+    try:
+        while len(summaries) < len(tenants):
+            try:
+                kind, pid, payload = results.get(timeout=1)
+                if kind == 'started':
+                    running[pid] = (payload, time.monotonic())
+                else:
+                    running.pop(pid, None)
+                    summaries[payload['name']] = payload
+                    _logger.info(
+                        f"Tenant {payload['name']} finished in "
+                        f"{payload['seconds']:.1f}s")
+            except queue.Empty:
+                pass
+            for pid, (name, started) in list(running.items()):
+                if time.monotonic() - started > by_name[name]['timeout']:
+                    give_up(pid, f"timed out after {by_name[name]['timeout']:.0f}s")
+                elif not procs[pid].is_alive():
+                    give_up(pid, f"worker died with exit code {procs[pid].exitcode}")
+            if not running and not any(p.is_alive() for p in procs.values()):
+                break
+    finally:
+        for pid in list(procs):
+            if pid in running:
+                kill_process_tree(pid)
+            procs[pid].join(timeout=30)
+            if procs[pid].is_alive():
+                kill_process_tree(pid)
+
+    ordered = [summaries.get(t['name'], {'name': t['name'], 'error': 'not run'})
+               for t in tenants]
+    print_tenant_summary(ordered)
+    return ordered
+
+
+def print_tenant_summary(summaries):
+    print(f"{'tenant':<20} {'backend':<10} {'seconds':>8} {'scraped':>8} "
+          f"{'confirmed':>9} {'failed':>6}  result")
+    for row in summaries:
+        outcome = row.get('error') or (
+            'complete' if row.get('complete') else 'incomplete')
+        if row.get('reused'):
+            outcome += ' (reused backend)'
+        print(f"{row['name']:<20} {row.get('backend') or '-':<10} "
+              f"{row.get('seconds', 0):>8.1f} {row.get('scraped', 0):>8} "
+              f"{row.get('confirmed', 0):>9} {row.get('failed', 0):>6}  {outcome}")
+
+
+def date_arg(value):
+    return datetime.strptime(value, '%Y-%m-%d')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Scrape 3CX call reports into Odoo")
+    parser.add_argument(
+        '--backend', default=THREECX_BACKEND,
+        choices=['auto', 'browser'] + list(BACKENDS),
+        help="how to read the call report (default from THREECX_BACKEND)")
+    parser.add_argument(
+        '--daemon', action='store_true',
+        help="keep one browser and Odoo connection alive and poll the report")
+    parser.add_argument(
+        '--drain-outbox', action='store_true',
+        help="push pending outbox rows to Odoo without starting a browser")
+    parser.add_argument(
+        '--interval', type=float, default=DAEMON_INTERVAL_SECONDS,
+        help="seconds between daemon polls")
+    parser.add_argument(
+        '--jitter', type=float, default=DAEMON_JITTER_SECONDS,
+        help="random +/- seconds added to each daemon poll interval")
+    parser.add_argument(
+        '--max-browser-rss-mb', type=float, default=DAEMON_MAX_BROWSER_RSS_MB,
+        help="restart the browser when its memory grows past this")
+    parser.add_argument(
+        '--backfill', action='store_true',
+        help="scrape a historical range in parallel chunks, resumable")
+    parser.add_argument(
+        '--from', dest='date_from', type=date_arg,
+        help="first day of the backfill or replay, YYYY-MM-DD")
+    parser.add_argument(
+        '--to', dest='date_to', type=date_arg,
+        help="last day of the backfill or replay, YYYY-MM-DD (default today)")
+    parser.add_argument(
+        '--chunk', default=BACKFILL_CHUNK, choices=['day', 'week'],
+        help="backfill chunk size")
+    parser.add_argument(
+        '--workers', type=int, default=BACKFILL_WORKERS,
+        help="parallel backfill or tenant workers, 0 sizes them to cores and RAM")
+    parser.add_argument(
+        '--replay', nargs='+', metavar='PATH',
+        help="push archived raw pages (files or capture directories) again "
+             "without 3CX, optionally limited by --from/--to")
+    parser.add_argument(
+        '--dry-run', action='store_true',
+        help="with --replay, only parse the archives")
+    parser.add_argument(
+        '--tenants', metavar='CONFIG',
+        help="JSON file of 3CX/Odoo tenant pairs to run one after another")
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        replay_captures(args.replay, args.date_from,
+                        args.date_to + timedelta(days=1) if args.date_to else None,
+                        push=not args.dry_run)
+    elif args.tenants:
+        run_tenants(load_tenants(args.tenants), args.workers, args.backend)
+    elif args.backfill:
+        if not args.date_from:
+            parser.error("--backfill needs --from")
+        date_to = args.date_to or datetime.now().replace(
+            hour=0, minute=0, second=0, microsecond=0)
+        run_backfill(args.date_from, date_to + timedelta(days=1), args.chunk,
+                     args.workers, args.backend)
+    elif args.drain_outbox:
+        _logger.info("Draining outbox...")
+        state = open_state_db()
+        drained = drain_outbox(state)
+        state.close()
+        if drained['pending']:
+            _logger.warning(f"{drained['pending']} outbox rows still pending")
+    elif args.daemon:
+        run_daemon(args.interval, args.jitter, args.max_browser_rss_mb,
+                   args.backend)
     else:
-        _logger.warning("No data was scraped")
+        _logger.info("Starting 3CX scraper...")
+        metrics.reset()
+        state = open_state_db()
+        summary = run_incremental(
+            state, lambda *a: iter_3cx_pages(*a, backend=args.backend))
+        state.close()
+        write_run_metrics(summary)
+
+        _logger.info(f"Scraped {summary['scraped']} records")
+        if summary['scraped']:
+            _logger.info("Scraping completed successfully")
+        else:
+            _logger.warning("No data was scraped")
+
+
+if __name__ == "__main__":
+    main()